@@ -0,0 +1,202 @@
+#!/usr/bin/env python3.13
+"""
+MCP Registry response cache
+
+This module persists MCP Registry responses on disk so that repeated CLI
+invocations can skip the network round-trip while an entry is fresh, and
+revalidate it with a conditional GET once it goes stale.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+DEFAULT_CACHE_TTL = 86400
+
+# Number of entries each cache keeps decoded in memory
+MEMORY_CACHE_SIZE = 256
+
+
+def get_cache_dir() -> Path:
+    """Get the cache directory from environment variable or default"""
+    cache_dir = os.environ.get("MCP_INSTALLER_CACHE_DIR")
+    if cache_dir:
+        return Path(cache_dir)
+    return Path.home() / ".cache" / "mcp_installer"
+
+
+def get_cache_ttl() -> int:
+    """Get the registry cache TTL in seconds from environment variable or default"""
+    try:
+        return int(os.environ.get("MCP_REGISTRY_CACHE_TTL", DEFAULT_CACHE_TTL))
+    except ValueError:
+        return DEFAULT_CACHE_TTL
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """
+    Parse a Cache-Control header into its directives
+
+    Args:
+        value: Raw header value, may be None
+
+    Returns:
+        Dictionary mapping lower-cased directive names to their value, or None
+        for directives without one (e.g. 'no-store')
+    """
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else None
+    return directives
+
+
+class RegistryCache:
+    """File-backed cache for MCP Registry responses, fronted by an in-memory LRU"""
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        ttl: Optional[int] = None,
+        refresh: bool = False,
+        persist: bool = True
+    ):
+        """
+        Initialize the cache with an optional custom directory and TTL
+
+        With refresh set, every entry is treated as stale so it is revalidated
+        with the registry before use, while unchanged responses still only
+        cost a 304. Without persist, entries only live in memory for the
+        lifetime of this instance.
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else get_cache_dir()
+        self.ttl = get_cache_ttl() if ttl is None else ttl
+        self.refresh = refresh
+        self.persist = persist
+        # Recently used entries, so repeated lookups in a long-lived process
+        # skip reading and decoding the file
+        self._memory = OrderedDict()
+        self._memory_lock = threading.Lock()
+
+    def _entry_path(self, key: str) -> Path:
+        """Map a cache key (usually a request URL) to its file on disk"""
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{digest}.json"
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        """Keep an entry in the in-memory LRU, evicting the oldest one if full"""
+        with self._memory_lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            if len(self._memory) > MEMORY_CACHE_SIZE:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached entry for a key
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Entry with 'body', 'stored_at', 'etag', 'last_modified' and
+            'max_age' fields, or None if there is no readable entry
+        """
+        with self._memory_lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+
+        if not self.persist:
+            return None
+
+        try:
+            with open(self._entry_path(key), 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(entry, dict) or "body" not in entry:
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        """Check whether an entry can be served without revalidation"""
+        if self.refresh:
+            return False
+        ttl = self.ttl
+        if entry.get("max_age") is not None:
+            # The server's Cache-Control max-age can shorten, never extend, the TTL
+            ttl = min(ttl, entry["max_age"])
+        return time.time() - entry.get("stored_at", 0) < ttl
+
+    def set(
+        self,
+        key: str,
+        body: Any,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        max_age: Optional[int] = None
+    ) -> None:
+        """
+        Store a response body along with its validators
+
+        Args:
+            key: Cache key
+            body: Decoded JSON response body
+            etag: Value of the response ETag header, if any
+            last_modified: Value of the response Last-Modified header, if any
+            max_age: Freshness lifetime advertised by the server, if any
+        """
+        if self.ttl <= 0:
+            return
+
+        entry = {
+            "stored_at": time.time(),
+            "etag": etag,
+            "last_modified": last_modified,
+            "max_age": max_age,
+            "body": body,
+        }
+        self._remember(key, entry)
+        if not self.persist:
+            return
+
+        # Write to a temporary file first so concurrent readers never see
+        # a partially written entry
+        tmp_path = None
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._entry_path(key))
+        except (OSError, TypeError, ValueError):
+            # Caching is best-effort, a read-only home must not break the CLI
+            if tmp_path:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+
+    def clear(self) -> None:
+        """Remove all cached entries"""
+        with self._memory_lock:
+            self._memory.clear()
+        if not self.persist or not self.cache_dir.is_dir():
+            return
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
@@ -6,28 +6,59 @@ Provides functionality to load, verify, and install MCP servers
 from a configuration file.
 """
 
+import itertools
 import os
+import re
 import sys
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Set
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 import click
-import yaml
 
-from mcp_installer.registry import MCPRegistryClient, convert_to_vscode_config, install_server_in_vscode
+from mcp_installer.registry import (
+    MCPRegistryClient,
+    add_server_to_settings,
+    convert_to_vscode_config,
+    install_server_in_vscode,
+    read_vscode_settings,
+    write_vscode_settings,
+)
 
 
-def find_mcp_config_file(filename: str = "mcp.yml") -> Optional[Path]:
+# Environment variable names that look like secrets get hidden input when prompting
+_SECRET_RE = re.compile(r"TOKEN|SECRET|KEY|PASSWORD|PASS", re.IGNORECASE)
+
+# Registry server IDs are UUIDs, anything else in mcp.yml is looked up by name
+_ID_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.IGNORECASE)
+
+
+# mcp.yml paths found so far, keyed by (filename, cwd). Misses are never
+# stored, so a config file created later in the process is still picked up
+_mcp_config_files: Dict[Tuple[str, Path], Path] = {}
+
+
+def find_mcp_config_file(filename: str = "mcp.yml", cwd: Optional[Path] = None) -> Optional[Path]:
     """Find mcp.yml config file by searching up from current directory."""
-    cwd = Path.cwd()
+    key = (filename, cwd or Path.cwd())
     
-    # Look in current directory and parents
-    for path in [cwd, *cwd.parents]:
-        config_path = path / filename
-        if config_path.exists():
-            return config_path
+    # Reuse an earlier match only while the file is still there
+    config_path = _mcp_config_files.get(key)
+    if config_path is not None and config_path.exists():
+        return config_path
     
-    return None
+    config_path = _find_mcp_config_file(*key)
+    if config_path is None:
+        _mcp_config_files.pop(key, None)
+    else:
+        _mcp_config_files[key] = config_path
+    return config_path
+
+
+def _find_mcp_config_file(filename: str, cwd: Path) -> Optional[Path]:
+    """Search cwd and its parents for filename."""
+    # Look in current directory and parents, stopping at the first match
+    candidates = (path / filename for path in itertools.chain((cwd,), cwd.parents))
+    return next((config_path for config_path in candidates if config_path.exists()), None)
 
 
 def load_mcp_config(config_path: Path) -> Dict:
@@ -43,11 +74,19 @@ def load_mcp_config(config_path: Path) -> Dict:
     Raises:
         ValueError: If the file cannot be parsed as YAML
     """
-    with open(config_path, 'r') as f:
-        try:
-            return yaml.safe_load(f)
-        except yaml.YAMLError as e:
-            raise ValueError(f"Failed to parse MCP config file: {e}")
+    with open(config_path, 'rb') as f:
+        content = f.read()
+    
+    # Imported lazily so that importing this module does not pay for PyYAML
+    import yaml
+    
+    # Prefer the libyaml-backed loader when PyYAML was built with it
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    
+    try:
+        return yaml.load(content, Loader=loader)
+    except yaml.YAMLError as e:
+        raise ValueError(f"Failed to parse MCP config file: {e}")
 
 
 def resolve_server_from_registry(
@@ -68,25 +107,23 @@ def resolve_server_from_registry(
         ValueError: If the server cannot be resolved
     """
     try:
-        # First try to resolve by ID (for backward compatibility)
-        try:
+        # IDs can be fetched directly, skip the search round-trip
+        if _ID_RE.match(server_identifier):
             return registry_client.get_server(server_identifier)
-        except Exception:
-            # If that fails, try to resolve by name
-            servers = registry_client.search_servers(server_identifier)
-            
-            # Look for an exact name match
-            for server in servers:
-                if server.get("name") == server_identifier:
-                    return registry_client.get_server(server.get("id"))
-            
-            # If no exact match, raise an error
-            if not servers:
-                raise ValueError(f"No server found with name: {server_identifier}")
-            
-            # If there are multiple matches but no exact match, use the first one
-            # (assuming it's the latest version)
-            return registry_client.get_server(servers[0].get("id"))
+        
+        servers = registry_client.search_servers(server_identifier)
+        
+        # Look for an exact name match, falling back to the first one
+        # (assuming it's the latest version)
+        match = next((server for server in servers if server.get("name") == server_identifier), None)
+        if match is None and servers:
+            match = servers[0]
+        if match is not None:
+            # Search results already carry the full entry when packages are listed
+            return match if "packages" in match else registry_client.get_server(match.get("id"))
+        
+        # Last resort for IDs in a format we don't recognize
+        return registry_client.get_server(server_identifier)
             
     except Exception as e:
         raise ValueError(f"Server not found in registry: {server_identifier}") from e
@@ -94,7 +131,8 @@ def resolve_server_from_registry(
 
 def resolve_servers_from_registry_batch(
     registry_client: MCPRegistryClient,
-    server_identifiers: List[str]
+    server_identifiers: List[str],
+    progress: Optional[Callable[[int, int], None]] = None
 ) -> Dict[str, Dict]:
     """
     Resolve multiple servers from the registry in batch for better performance.
@@ -102,6 +140,8 @@ def resolve_servers_from_registry_batch(
     Args:
         registry_client: MCPRegistryClient instance
         server_identifiers: List of server IDs or names from mcp.yml
+        progress: Optional callback invoked with (completed, total) as server
+            details arrive from the registry
         
     Returns:
         Dictionary mapping server identifiers to their registry data
@@ -110,7 +150,7 @@ def resolve_servers_from_registry_batch(
         ValueError: If any of the servers cannot be resolved
     """
     # Use the batch search function to minimize network requests
-    server_details = registry_client.batch_search_servers(server_identifiers)
+    server_details = registry_client.batch_search_servers(server_identifiers, progress=progress)
     
     # Check if any servers were not found
     missing_servers = [id for id, data in server_details.items() if data is None]
@@ -123,6 +163,35 @@ def resolve_servers_from_registry_batch(
     return server_details
 
 
+def prompt_for_env_vars(vscode_config: Dict[str, Any]) -> None:
+    """
+    Prompt for the value of each environment variable in a VSCode server configuration.
+    
+    Values already set in the environment are offered as defaults, and
+    variables that look like secrets are read with hidden input.
+    
+    Args:
+        vscode_config: VSCode server configuration, updated in place
+    """
+    click.secho("\nEnvironment Variables:", fg="yellow")
+    env_snapshot = dict(os.environ)
+    for env_name in vscode_config["env"]:
+        env_hidden = bool(_SECRET_RE.search(env_name))
+        
+        # Check if already set in environment
+        default_value = env_snapshot.get(env_name, "")
+        
+        # Prompt user
+        env_value = click.prompt(
+            f"  {env_name}", 
+            default=default_value,
+            hide_input=env_hidden,
+            show_default=not env_hidden and bool(default_value)
+        )
+        
+        vscode_config["env"][env_name] = env_value
+
+
 def install_server_from_registry(
     server_identifier: str, 
     registry_client: MCPRegistryClient, 
@@ -164,22 +233,7 @@ def install_server_from_registry(
     
     # If in interactive mode and env vars are present, prompt for values
     if interactive and "env" in vscode_config:
-        click.secho("\nEnvironment Variables:", fg="yellow")
-        for env_name in vscode_config["env"].keys():
-            env_hidden = any(keyword in env_name.upper() for keyword in ["TOKEN", "SECRET", "KEY", "PASSWORD", "PASS"])
-            
-            # Check if already set in environment
-            default_value = os.environ.get(env_name, "")
-            
-            # Prompt user
-            env_value = click.prompt(
-                f"  {env_name}", 
-                default=default_value,
-                hide_input=env_hidden,
-                show_default=not env_hidden and bool(default_value)
-            )
-            
-            vscode_config["env"][env_name] = env_value
+        prompt_for_env_vars(vscode_config)
     
     # Install in VSCode settings
     try:
@@ -193,3 +247,52 @@ def install_server_from_registry(
     except Exception as e:
         click.secho(f"Error installing server: {e}", fg="red")
         return False
+
+
+class BatchInstaller:
+    """
+    Install several servers into VSCode settings with a single write.
+    
+    settings.json is read once on entry, every install updates the parsed
+    settings in memory, and the result is written atomically on exit.
+    Servers installed before an error are still written out; if that write
+    fails too, it is reported and the original error propagates.
+    
+    Usage:
+        with BatchInstaller(settings_path) as installer:
+            installer.install(vscode_config)
+    """
+    
+    def __init__(self, vscode_settings_path: Path):
+        """Initialize the installer for the given settings.json"""
+        self.vscode_settings_path = vscode_settings_path
+        self.settings = None
+        self.installed = []
+    
+    def __enter__(self) -> "BatchInstaller":
+        self.settings = read_vscode_settings(self.vscode_settings_path)
+        return self
+    
+    def install(self, vscode_config: Dict[str, Any]) -> str:
+        """
+        Add a server to the pending settings.
+        
+        Args:
+            vscode_config: VSCode server configuration
+            
+        Returns:
+            Name the server was stored under
+        """
+        server_name = add_server_to_settings(self.settings, vscode_config)
+        self.installed.append(server_name)
+        return server_name
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if self.installed:
+            try:
+                write_vscode_settings(self.vscode_settings_path, self.settings)
+            except OSError as e:
+                if exc_type is None:
+                    raise ValueError(f"Failed to update settings file: {e}") from e
+                # Don't mask the error that ended the batch, just report the lost write
+                click.secho(f"Failed to update settings file: {e}", fg="red", err=True)
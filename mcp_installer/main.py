@@ -6,12 +6,15 @@ This tool checks if the required MCP servers (specified by Docker image strings)
 are installed in VSCode's settings.
 """
 
-import sys
-import time
-import threading
+import contextlib
+import functools
 import itertools
+import mmap
+import os
+import re
+import sys
 from pathlib import Path
-from typing import List, Dict, Set, Optional
+from typing import AbstractSet, Any, Callable, FrozenSet, Iterator, List, Dict, Optional
 
 # Use commentjson to parse JSON with comments
 try:
@@ -19,17 +22,51 @@ try:
 except ImportError:
     import json
 
+# Prefer orjson's C parser and serializer when it is installed
+try:
+    from orjson import OPT_INDENT_2, dumps as _orjson_dumps, loads as _json_loads
+    
+    def _json_dumps_pretty(obj) -> str:
+        return _orjson_dumps(obj, option=OPT_INDENT_2).decode("utf-8")
+except ImportError:
+    def _json_loads(data: bytes):
+        return json.loads(data.decode("utf-8"))
+    
+    def _json_dumps_pretty(obj) -> str:
+        return json.dumps(obj, indent=2)
+
 import click
 
 
+# Leading 'docker run' tokens and flags skipped before looking for the image
+_DOCKER_SKIP = frozenset({"docker", "run", "-i", "--rm"})
+# Number of arguments taken by Docker flags that consume a value, any other flag takes 1
+_DOCKER_FLAG_ARITY = {"-e": 2, "--env": 2, "-v": 2, "--volume": 2, "-p": 2, "--publish": 2}
+
+# A JSON string literal (captured) or a // or /* */ comment, in a single pass
+_JSONC_COMMENT_RE = re.compile(rb'("[^"\\]*(?:\\.[^"\\]*)*")|//[^\n]*|/\*.*?\*/', re.DOTALL)
+
+# Settings files at least this large are memory-mapped rather than read
+_MMAP_MIN_SIZE = 1 << 20
+# Settings files at least this large get their server identifiers cached on
+# disk, smaller ones parse faster than a cache entry can be read back
+_SERVER_CACHE_MIN_SIZE = 256 << 10
+# Cached identifiers are checked against the file's mtime and size, so they
+# get a fixed lifetime of their own rather than the registry response TTL
+_SERVER_CACHE_TTL = 7 * 86400
+
+# Location of the VSCode settings.json relative to the home directory, per platform
+_SETTINGS_SUBPATHS = {
+    'darwin': Path('Library', 'Application Support', 'Code', 'User', 'settings.json'),  # macOS
+    'win32': Path('AppData', 'Roaming', 'Code', 'User', 'settings.json'),  # Windows
+}
+_DEFAULT_SETTINGS_SUBPATH = Path('.config', 'Code', 'User', 'settings.json')  # Linux and others
+
+
+@functools.lru_cache(maxsize=None)
 def find_settings_file() -> Path:
     """Locate the VSCode settings.json file based on the operating system."""
-    if sys.platform == 'darwin':  # macOS
-        settings_path = Path.home() / 'Library' / 'Application Support' / 'Code' / 'User' / 'settings.json'
-    elif sys.platform == 'win32':  # Windows
-        settings_path = Path.home() / 'AppData' / 'Roaming' / 'Code' / 'User' / 'settings.json'
-    else:  # Linux and others
-        settings_path = Path.home() / '.config' / 'Code' / 'User' / 'settings.json'
+    settings_path = Path.home() / _SETTINGS_SUBPATHS.get(sys.platform, _DEFAULT_SETTINGS_SUBPATH)
     
     if not settings_path.exists():
         raise FileNotFoundError(f"VSCode settings file not found at {settings_path}")
@@ -37,108 +74,183 @@ def find_settings_file() -> Path:
     return settings_path
 
 
-def extract_mcp_servers(settings_path: Path) -> Set[str]:
+def strip_jsonc_comments(data: bytes) -> bytes:
+    """Remove // and /* */ comments from JSONC, leaving string literals untouched."""
+    # Strings are matched and put back as-is, so '//' inside a URL is not a comment
+    return _JSONC_COMMENT_RE.sub(rb'\1', data)
+
+
+def parse_jsonc(data: bytes) -> Any:
+    """Parse JSONC bytes (or a read-only mmap of them), using orjson when available."""
+    return _json_loads(strip_jsonc_comments(data))
+
+
+def _load_settings(settings_path: Path) -> Dict:
+    """
+    Load the parsed settings.json, reusing the previous parse until the file changes.
+    
+    The returned dict is shared between callers and must not be mutated.
+    """
+    stat = os.stat(settings_path)
+    return _parse_settings_file(settings_path, stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_settings_file(settings_path: Path, mtime_ns: int, size: int) -> Dict:
+    """Read and parse settings.json, stripping comments for JSONC support."""
+    # Work on raw bytes, orjson parses them without a separate decode step
+    with open(settings_path, 'rb') as f:
+        # Remove comments, reading large files straight from the page cache
+        # rather than copying them into a buffer first
+        try:
+            if size >= _MMAP_MIN_SIZE:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    return parse_jsonc(data)
+            return parse_jsonc(f.read())
+        except ValueError as e:
+            raise ValueError(f"Failed to parse settings file: {e}") from e
+
+
+def extract_mcp_servers(settings_path: Path) -> FrozenSet[str]:
     """
     Extract the list of installed MCP servers from settings.json.
     
     Identifies each MCP server based on its configuration and returns a set
-    of server identifiers.
+    of server identifiers. For large settings files the result is also cached
+    on disk, keyed by the file's modification time and size, so repeated CLI
+    invocations skip the parse entirely.
     """
-    # Read the file and strip out any comments (for JSONC support)
-    with open(settings_path, 'r') as f:
-        content = f.read()
-    
-    # Remove single-line comments
-    import re
-    content = re.sub(r'//.*$', '', content, flags=re.MULTILINE)
+    stat = os.stat(settings_path)
+    return _extract_mcp_servers(settings_path, stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=8)
+def _extract_mcp_servers(settings_path: Path, mtime_ns: int, size: int) -> FrozenSet[str]:
+    """Extract server identifiers once per version of settings.json in this process."""
+    if size < _SERVER_CACHE_MIN_SIZE:
+        return extract_mcp_servers_from_settings(
+            _parse_settings_file(settings_path, mtime_ns, size)
+        )
     
-    # Now parse the JSON
-    try:
-        settings = json.loads(content)
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Failed to parse settings file: {e}") from e
+    from mcp_installer.cache import RegistryCache, get_cache_dir
     
-    mcp_servers = set()
+    cache = RegistryCache(cache_dir=get_cache_dir() / "settings", ttl=_SERVER_CACHE_TTL)
+    key = str(Path(settings_path).resolve())
+    entry = cache.get(key)
+    if entry is not None and cache.is_fresh(entry):
+        body = entry["body"]
+        # Anything malformed is treated as a miss and re-parsed
+        if (
+            isinstance(body, dict)
+            and body.get("mtime_ns") == mtime_ns
+            and body.get("size") == size
+            and isinstance(body.get("servers"), list)
+        ):
+            return frozenset(body["servers"])
     
+    servers = extract_mcp_servers_from_settings(
+        _parse_settings_file(settings_path, mtime_ns, size)
+    )
+    cache.set(key, {"mtime_ns": mtime_ns, "size": size, "servers": sorted(servers)})
+    return servers
+
+
+def extract_mcp_servers_from_settings(settings: Dict) -> FrozenSet[str]:
+    """Extract the set of installed MCP server identifiers from parsed settings."""
     # Check for MCP server settings (mcp.servers)
     if "mcp" in settings and "servers" in settings["mcp"]:
-        servers = settings["mcp"]["servers"]
-        for server_name, config in servers.items():
-            command = config.get('command', 'unknown')
-            
-            # Different handling based on server type
-            if command == "docker" and "args" in config:
-                # For Docker servers, extract the image name
-                docker_image = extract_docker_image(config["args"])
-                if docker_image:
-                    mcp_servers.add(docker_image)
-                else:
-                    # Fallback if we couldn't extract the image name - just use the server name
-                    mcp_servers.add(server_name)
-            
-            elif command == "npx" and "args" in config:
-                # For NPM packages, extract the package name
-                npm_package = extract_npm_package(config["args"])
-                if npm_package:
-                    mcp_servers.add(npm_package)
-                else:
-                    # Fallback if we couldn't extract the package name - just use the server name
-                    mcp_servers.add(server_name)
-            
-            else:
-                # For any other server type
-                mcp_servers.add(server_name)
+        return frozenset(_iter_server_idents(settings["mcp"]["servers"]))
+    
+    return frozenset()
+
 
-    return mcp_servers
+def _iter_server_idents(servers: Dict) -> Iterator[str]:
+    """Yield the identifier of each configured MCP server."""
+    for server_name, config in servers.items():
+        # Pick the identifier extractor for this server type, if any
+        extractor = _EXTRACTORS.get(config.get('command'))
+        identifier = extractor(config["args"]) if extractor and "args" in config else None
+        
+        # Fallback if we couldn't extract an identifier - just use the server name.
+        # Interned so lookups against interned queries can match by identity
+        yield sys.intern(identifier or server_name)
 
 def extract_docker_image(args: List[str]) -> str:
     """Extract Docker image name from command arguments."""
-    i = 0
-    
     # Skip 'docker run' part and common flags
-    while i < len(args) and args[i] in ["docker", "run", "-i", "--rm"]:
-        i += 1
+    remaining = itertools.dropwhile(_DOCKER_SKIP.__contains__, args)
     
     # Process the remaining arguments
-    while i < len(args):
-        arg = args[i]
-        if arg.startswith("-"):
-            # Skip option flags and their values
-            if arg in ["-e", "--env", "-v", "--volume", "-p", "--publish"]:
-                i += 2  # Skip the flag and its value
-            else:
-                i += 1  # Skip just the flag
-        else:
-            # Found a non-flag argument, check if it looks like a Docker image
-            if (":" in arg or "/" in arg or 
-                arg.startswith("ghcr.io/") or 
-                arg.startswith("mcr.microsoft.com/") or
-                not arg.startswith("-")):
-                return arg
-            i += 1
+    for arg in remaining:
+        if not arg.startswith("-"):
+            # The first non-flag argument is the Docker image
+            return arg
+        
+        # Skip the option flag's value, if it takes one
+        for _ in range(_DOCKER_FLAG_ARITY.get(arg, 1) - 1):
+            next(remaining, None)
     
     return None
 
 def extract_npm_package(args: List[str]) -> str:
     """Extract NPM package name from command arguments."""
-    for i, arg in enumerate(args):
-        # Look for an argument that starts with '@' or contains a '/' which is common for npm packages
-        if arg.startswith("@") or ("/" in arg and not arg.startswith("-")):
-            if "@latest" in arg:
-                # Extract just the package name if it has a version specifier
-                return arg.split("@latest")[0]
-            return arg
+    # Look for an argument that starts with '@' or contains a '/' which is common for npm packages
+    package = next(
+        (arg for arg in args if arg.startswith("@") or ("/" in arg and not arg.startswith("-"))),
+        None
+    )
+    if package is not None:
+        # Extract just the package name if it has a version specifier
+        return package.partition("@latest")[0]
     
     # If we can't find a package name, check for just npm commands
-    if len(args) > 0 and not args[0].startswith("-"):
+    if args and not args[0].startswith("-"):
         return args[0]
         
     return None
-    
 
-def check_missing_servers(required_servers: List[str], installed_servers: Set[str]) -> List[str]:
+
+# Identifier extractors keyed by the server's launch command
+_EXTRACTORS = {
+    "docker": extract_docker_image,  # Docker image name
+    "npx": extract_npm_package,  # NPM package name
+}
+
+
+def check_missing_servers(required_servers: List[str], installed_servers: AbstractSet[str]) -> List[str]:
     """Check which required servers are missing from the installed set."""
-    return [server for server in required_servers if server not in installed_servers]
+    # Let set difference do the bulk of the work, then restore the caller's order
+    missing = set(map(sys.intern, required_servers)).difference(installed_servers)
+    if not missing:
+        return []
+    return [server for server in required_servers if server in missing]
+
+
+@contextlib.contextmanager
+def _status_line(message: str) -> Iterator[Callable[[int, int], None]]:
+    """
+    Show a transient status message while a slow step runs, on terminals only.
+    
+    Yields a progress callback that appends a completed/total counter to the message.
+    """
+    interactive = sys.stdout.isatty()
+    width = len(message)
+    
+    def progress(completed: int, total: int) -> None:
+        nonlocal width
+        if interactive:
+            line = f"{message} {completed}/{total}"
+            width = max(width, len(line))
+            click.echo(f"\r{line}", nl=False)
+    
+    if interactive:
+        click.echo(message, nl=False)
+    try:
+        yield progress
+    finally:
+        if interactive:
+            # Clear the status line when done
+            click.echo("\r" + " " * width + "\r", nl=False)
 
 
 @click.group()
@@ -168,9 +280,9 @@ def check_servers(servers):
         
         # Report results
         if missing_servers:
-            click.secho("The following MCP servers are not installed:", fg="yellow")
-            for server in missing_servers:
-                click.secho(f"  - {server}", fg="red")
+            lines = [click.style("The following MCP servers are not installed:", fg="yellow")]
+            lines.extend(click.style(f"  - {server}", fg="red") for server in missing_servers)
+            click.echo("\n".join(lines))
             sys.exit(1)
         else:
             click.secho("All required MCP servers are installed.", fg="green")
@@ -188,45 +300,53 @@ def list_servers():
         settings_path = find_settings_file()
         click.secho(f"Found settings file at: {settings_path}", fg="green")
         
-        # Use the extract_mcp_servers function to get all servers
-        installed_servers = extract_mcp_servers(settings_path)
+        # Parse the settings once and reuse them for the detailed listing
+        settings = _load_settings(settings_path)
+        installed_servers = extract_mcp_servers_from_settings(settings)
         
+        # Build the whole report first and write it out in one go
+        lines = []
         if installed_servers:
-            click.secho("\nInstalled MCP servers:", fg="green")
-            for server in sorted(installed_servers):
-                click.secho(f"  - {server}", fg="blue")
-            click.secho(f"\nTotal: {len(installed_servers)} servers", fg="green")
+            lines.append(click.style("\nInstalled MCP servers:", fg="green"))
+            lines.extend(click.style(f"  - {server}", fg="blue") for server in sorted(installed_servers))
+            lines.append(click.style(f"\nTotal: {len(installed_servers)} servers", fg="green"))
             
             # Also print detailed server configurations
-            with open(settings_path, 'r') as f:
-                settings = json.load(f)
-                
             if "mcp" in settings and "servers" in settings["mcp"]:
-                click.secho("\nDetailed MCP Server Configurations:", fg="green")
+                lines.append(click.style("\nDetailed MCP Server Configurations:", fg="green"))
                 servers = settings["mcp"]["servers"]
                 
                 for server_name, config in servers.items():
-                    click.secho(f"\nServer: {server_name}", fg="blue", bold=True)
-                    click.secho(f"  Command: {config.get('command', 'N/A')}", fg="cyan")
+                    lines.append(click.style(f"\nServer: {server_name}", fg="blue", bold=True))
+                    lines.append(click.style(f"  Command: {config.get('command', 'N/A')}", fg="cyan"))
                     
                     if "args" in config:
                         args_str = " ".join(config["args"])
-                        click.secho(f"  Args: {args_str}", fg="cyan")
+                        lines.append(click.style(f"  Args: {args_str}", fg="cyan"))
                     
                     if "env" in config:
-                        click.secho("  Environment Variables:", fg="cyan")
+                        lines.append(click.style("  Environment Variables:", fg="cyan"))
                         for env_name, env_value in config["env"].items():
                             # Truncate long env values for readability
                             if len(str(env_value)) > 50:
                                 env_value = str(env_value)[:47] + "..."
-                            click.secho(f"    {env_name}: {env_value}", fg="cyan")
+                            lines.append(click.style(f"    {env_name}: {env_value}", fg="cyan"))
         else:
-            click.secho("No MCP servers detected in settings.json", fg="yellow")
+            lines.append(click.style("No MCP servers detected in settings.json", fg="yellow"))
+        
+        click.echo("\n".join(lines))
         
     except Exception as e:
         click.secho(f"Error: {e}", fg="red", err=True)
 
 
+# Shared by every command that talks to the registry
+_refresh_option = click.option(
+    '--refresh', is_flag=True,
+    help='Revalidate cached registry responses instead of using them as-is'
+)
+
+
 # Registry-related commands
 @cli.group('registry')
 def registry():
@@ -237,23 +357,27 @@ def registry():
 @registry.command('list')
 @click.option('--limit', default=30, help='Maximum number of entries to return')
 @click.option('--cursor', help='Pagination cursor for retrieving next set of results')
-def list_registry_servers(limit, cursor):
+@_refresh_option
+def list_registry_servers(limit, cursor, refresh):
     """List available MCP servers from the registry."""
     try:
         # Import here to avoid circular imports
         from mcp_installer.registry import MCPRegistryClient, get_registry_url
+        from mcp_installer.cache import RegistryCache
         
         registry_url = get_registry_url()
         click.secho(f"Using MCP Registry: {registry_url}", fg="green")
         
-        client = MCPRegistryClient(registry_url)
+        client = MCPRegistryClient(registry_url, cache=RegistryCache(refresh=refresh))
         results = client.list_servers(limit=limit, cursor=cursor)
         
         servers = results.get("servers", [])
         metadata = results.get("metadata", {})
         
+        # Build the whole report first and write it out in one go
+        lines = []
         if servers:
-            click.secho("\nMCP Registry Servers:", fg="green")
+            lines.append(click.style("\nMCP Registry Servers:", fg="green"))
             for server in servers:
                 name = server.get("name", "Unknown")
                 server_id = server.get("id", "")
@@ -263,18 +387,20 @@ def list_registry_servers(limit, cursor):
                 if len(description) > 100:
                     description = description[:97] + "..."
                     
-                click.secho(f"\nServer: {name}", fg="blue", bold=True)
-                click.secho(f"  ID: {server_id}", fg="cyan")
-                click.secho(f"  Description: {description}", fg="cyan")
+                lines.append(click.style(f"\nServer: {name}", fg="blue", bold=True))
+                lines.append(click.style(f"  ID: {server_id}", fg="cyan"))
+                lines.append(click.style(f"  Description: {description}", fg="cyan"))
                 
-            click.secho(f"\nTotal: {len(servers)} servers", fg="green")
+            lines.append(click.style(f"\nTotal: {len(servers)} servers", fg="green"))
             
             # Show pagination info
             next_cursor = metadata.get("next_cursor")
             if next_cursor:
-                click.secho(f"\nFor more results, run with --cursor={next_cursor}", fg="yellow")
+                lines.append(click.style(f"\nFor more results, run with --cursor={next_cursor}", fg="yellow"))
         else:
-            click.secho("No MCP servers found in the registry", fg="yellow")
+            lines.append(click.style("No MCP servers found in the registry", fg="yellow"))
+        
+        click.echo("\n".join(lines))
             
     except Exception as e:
         click.secho(f"Error: {e}", fg="red", err=True)
@@ -282,21 +408,25 @@ def list_registry_servers(limit, cursor):
 
 @registry.command('search')
 @click.argument('query')
-def search_registry_servers(query):
+@_refresh_option
+def search_registry_servers(query, refresh):
     """Search for MCP servers in the registry by name or description."""
     try:
         # Import here to avoid circular imports
         from mcp_installer.registry import MCPRegistryClient, get_registry_url
+        from mcp_installer.cache import RegistryCache
         
         registry_url = get_registry_url()
         click.secho(f"Using MCP Registry: {registry_url}", fg="green")
         click.secho(f"Searching for: '{query}'", fg="green")
         
-        client = MCPRegistryClient(registry_url)
+        client = MCPRegistryClient(registry_url, cache=RegistryCache(refresh=refresh))
         servers = client.search_servers(query)
         
+        # Build the whole report first and write it out in one go
+        lines = []
         if servers:
-            click.secho(f"\nFound {len(servers)} matching servers:", fg="green")
+            lines.append(click.style(f"\nFound {len(servers)} matching servers:", fg="green"))
             for server in servers:
                 name = server.get("name", "Unknown")
                 server_id = server.get("id", "")
@@ -306,11 +436,13 @@ def search_registry_servers(query):
                 if len(description) > 100:
                     description = description[:97] + "..."
                     
-                click.secho(f"\nServer: {name}", fg="blue", bold=True)
-                click.secho(f"  ID: {server_id}", fg="cyan")
-                click.secho(f"  Description: {description}", fg="cyan")
+                lines.append(click.style(f"\nServer: {name}", fg="blue", bold=True))
+                lines.append(click.style(f"  ID: {server_id}", fg="cyan"))
+                lines.append(click.style(f"  Description: {description}", fg="cyan"))
         else:
-            click.secho(f"No servers found matching '{query}'", fg="yellow")
+            lines.append(click.style(f"No servers found matching '{query}'", fg="yellow"))
+        
+        click.echo("\n".join(lines))
             
     except Exception as e:
         click.secho(f"Error: {e}", fg="red", err=True)
@@ -318,71 +450,79 @@ def search_registry_servers(query):
 
 @registry.command('show')
 @click.argument('server_id')
-def show_server_details(server_id):
+@_refresh_option
+def show_server_details(server_id, refresh):
     """Get detailed information about a specific MCP server."""
     try:
         # Import here to avoid circular imports
         from mcp_installer.registry import MCPRegistryClient, get_registry_url
+        from mcp_installer.cache import RegistryCache
         
         registry_url = get_registry_url()
         click.secho(f"Using MCP Registry: {registry_url}", fg="green")
         
-        client = MCPRegistryClient(registry_url)
+        client = MCPRegistryClient(registry_url, cache=RegistryCache(refresh=refresh))
         server_data = client.get_server(server_id)
         
+        # Build the whole report first and write it out in one go
+        lines = []
+        
         # Display server information
         name = server_data.get("name", "Unknown")
         description = server_data.get("description", "")
         
-        click.secho(f"\nServer: {name}", fg="blue", bold=True)
-        click.secho(f"ID: {server_id}", fg="cyan")
-        click.secho(f"Description: {description}", fg="cyan")
+        lines.append(click.style(f"\nServer: {name}", fg="blue", bold=True))
+        lines.append(click.style(f"ID: {server_id}", fg="cyan"))
+        lines.append(click.style(f"Description: {description}", fg="cyan"))
         
         # Display repository information
         repo = server_data.get("repository", {})
         if repo:
-            click.secho("\nRepository:", fg="green")
-            click.secho(f"  URL: {repo.get('url', 'N/A')}", fg="cyan")
-            click.secho(f"  Source: {repo.get('source', 'N/A')}", fg="cyan")
+            lines.append(click.style("\nRepository:", fg="green"))
+            lines.append(click.style(f"  URL: {repo.get('url', 'N/A')}", fg="cyan"))
+            lines.append(click.style(f"  Source: {repo.get('source', 'N/A')}", fg="cyan"))
         
         # Display version information
         version = server_data.get("version_detail", {})
         if version:
-            click.secho("\nVersion:", fg="green")
-            click.secho(f"  Version: {version.get('version', 'N/A')}", fg="cyan")
-            click.secho(f"  Release Date: {version.get('release_date', 'N/A')}", fg="cyan")
-            click.secho(f"  Latest: {version.get('is_latest', False)}", fg="cyan")
+            lines.append(click.style("\nVersion:", fg="green"))
+            lines.append(click.style(f"  Version: {version.get('version', 'N/A')}", fg="cyan"))
+            lines.append(click.style(f"  Release Date: {version.get('release_date', 'N/A')}", fg="cyan"))
+            lines.append(click.style(f"  Latest: {version.get('is_latest', False)}", fg="cyan"))
         
         # Display package information
         packages = server_data.get("packages", [])
         if packages:
-            click.secho("\nPackages:", fg="green")
+            lines.append(click.style("\nPackages:", fg="green"))
             for i, pkg in enumerate(packages):
-                registry_name = pkg.get("registry_name", "unknown")
-                name = pkg.get("name", "N/A")
-                version = pkg.get("version", "N/A")
+                pkg_get = pkg.get
+                registry_name = pkg_get("registry_name", "unknown")
+                name = pkg_get("name", "N/A")
+                version = pkg_get("version", "N/A")
                 
-                click.secho(f"\n  Package {i+1}: {name}", fg="blue")
-                click.secho(f"    Registry: {registry_name}", fg="cyan")
-                click.secho(f"    Version: {version}", fg="cyan")
+                lines.append(click.style(f"\n  Package {i+1}: {name}", fg="blue"))
+                lines.append(click.style(f"    Registry: {registry_name}", fg="cyan"))
+                lines.append(click.style(f"    Version: {version}", fg="cyan"))
                 
                 # Display arguments
-                args = pkg.get("package_arguments", [])
+                args = pkg_get("package_arguments", ())
                 if args:
-                    click.secho("    Arguments:", fg="cyan")
+                    lines.append(click.style("    Arguments:", fg="cyan"))
                     for arg in args:
                         arg_desc = arg.get("description", "")
                         arg_value = arg.get("value", "")
-                        click.secho(f"      - {arg_desc}: {arg_value}", fg="white")
+                        lines.append(click.style(f"      - {arg_desc}: {arg_value}", fg="white"))
                 
                 # Display environment variables
-                env_vars = pkg.get("environment_variables", [])
+                env_vars = pkg_get("environment_variables", ())
                 if env_vars:
-                    click.secho("    Environment Variables:", fg="cyan")
+                    lines.append(click.style("    Environment Variables:", fg="cyan"))
                     for env in env_vars:
                         env_name = env.get("name", "")
                         env_desc = env.get("description", "")
-                        click.secho(f"      - {env_name}: {env_desc}", fg="white")
+                        lines.append(click.style(f"      - {env_name}: {env_desc}", fg="white"))
+        
+        click.echo("\n".join(lines))
                         
     except Exception as e:
         click.secho(f"Error: {e}", fg="red", err=True)
@@ -391,7 +531,8 @@ def show_server_details(server_id):
 @registry.command('install')
 @click.argument('identifier')
 @click.option('--by-id', is_flag=True, help='Interpret the identifier as a server ID')
-def install_registry_server(identifier, by_id):
+@_refresh_option
+def install_registry_server(identifier, by_id, refresh):
     """
     Install an MCP server from the registry to VS Code.
     
@@ -405,11 +546,12 @@ def install_registry_server(identifier, by_id):
             convert_to_vscode_config, 
             install_server_in_vscode
         )
+        from mcp_installer.cache import RegistryCache
         
         registry_url = get_registry_url()
         click.secho(f"Using MCP Registry: {registry_url}", fg="green")
         
-        client = MCPRegistryClient(registry_url)
+        client = MCPRegistryClient(registry_url, cache=RegistryCache(refresh=refresh))
         
         # Find server by ID or name
         server_data = None
@@ -433,8 +575,9 @@ def install_registry_server(identifier, by_id):
                 click.secho("\nPlease use --by-id flag with the specific server ID", fg="yellow")
                 return
                 
-            # Use the first (and only) match
-            server_data = client.get_server(servers[0]["id"])
+            # Use the first (and only) match, the search results already carry
+            # the full server entry when the registry lists packages
+            server_data = servers[0] if "packages" in servers[0] else client.get_server(servers[0]["id"])
         
         if not server_data:
             click.secho("Server not found", fg="red")
@@ -448,7 +591,7 @@ def install_registry_server(identifier, by_id):
         
         # Show the configuration
         click.secho("\nVS Code configuration:", fg="green")
-        click.secho(json.dumps(vscode_config, indent=2), fg="cyan")
+        click.secho(_json_dumps_pretty(vscode_config), fg="cyan")
         
         # Confirm installation
         if click.confirm("Do you want to install this server?"):
@@ -475,15 +618,13 @@ def config_commands():
 @config_commands.command('install')
 @click.option('--config-file', default='mcp.yml', help='Path to MCP config file')
 @click.option('--no-interactive', is_flag=True, help='Do not prompt for environment variables')
-def install_from_config(config_file, no_interactive):
+@_refresh_option
+def install_from_config(config_file, no_interactive, refresh):
     """Install MCP servers from a configuration file."""
     try:
-        import os
-        import time
-        import threading
-        import itertools
-        from mcp_installer.config import find_mcp_config_file, load_mcp_config, install_server_from_registry, resolve_servers_from_registry_batch
-        from mcp_installer.registry import MCPRegistryClient, get_registry_url
+        from mcp_installer.config import BatchInstaller, find_mcp_config_file, load_mcp_config, prompt_for_env_vars, resolve_servers_from_registry_batch
+        from mcp_installer.registry import MCPRegistryClient, convert_to_vscode_config, get_registry_url
+        from mcp_installer.cache import RegistryCache
         
         # Find the config file
         config_path = Path(config_file) if os.path.exists(config_file) else find_mcp_config_file(config_file)
@@ -504,105 +645,89 @@ def install_from_config(config_file, no_interactive):
         # Set up registry client
         registry_url = get_registry_url()
         click.secho(f"Using MCP Registry: {registry_url}", fg="green")
-        registry_client = MCPRegistryClient(registry_url)
+        registry_client = MCPRegistryClient(registry_url, cache=RegistryCache(refresh=refresh))
         
         # Find VSCode settings
         vscode_settings_path = find_settings_file()
         
-        # Set up progress spinner
-        done_loading = False
-        def spinner_task():
-            spinner = itertools.cycle(['⣾', '⣽', '⣻', '⢿', '⡿', '⣟', '⣯', '⣷'])
-            while not done_loading:
-                click.echo(f"\r{next(spinner)} Loading server data...", nl=False)
-                time.sleep(0.1)
-            # Clear the spinner line when done
-            click.echo("\r" + " " * 40 + "\r", nl=False)
-            
-        # Start spinner in background thread
-        spinner_thread = threading.Thread(target=spinner_task)
-        spinner_thread.daemon = True
-        spinner_thread.start()
+        # Pre-fetch all server details in one batch operation
+        server_identifiers = config["servers"]
+        with _status_line("Loading server data...") as progress:
+            server_details = resolve_servers_from_registry_batch(registry_client, server_identifiers, progress)
         
-        try:
-            # Pre-fetch all server details in one batch operation
-            server_identifiers = config["servers"]
-            server_details = resolve_servers_from_registry_batch(registry_client, server_identifiers)
-        finally:
-            # Stop the spinner
-            done_loading = True
-            spinner_thread.join(0.5)
-        
-        # Install each server
-        success_count = 0
-        
-        for server_id in server_identifiers:
-            # Initialize server_data to None
-            server_data = server_details.get(server_id)
-            
-            if server_data:
-                # Get server name from registry data
-                registry_name = server_data.get("name", "")
-                server_name = registry_name.split("/")[-1] if "/" in registry_name else registry_name
-                
-                click.secho(f"\nInstalling server: {server_name}", fg="green")
-                click.secho(f"  ID: {server_data.get('id')}", fg="blue")
+        # Install each server, writing settings.json once at the end
+        staged_count = 0
+        
+        with BatchInstaller(vscode_settings_path) as installer:
+            for server_id in server_identifiers:
+                # Initialize server_data to None
+                server_data = server_details.get(server_id)
                 
-                # Convert to VSCode configuration
-                try:
-                    from mcp_installer.registry import convert_to_vscode_config
-                    vscode_config = convert_to_vscode_config(server_data)
+                if server_data:
+                    # Get server name from registry data
+                    registry_name = server_data.get("name", "")
+                    server_name = registry_name.split("/")[-1] if "/" in registry_name else registry_name
                     
-                    # If in interactive mode and env vars are present, prompt for values
-                    if not no_interactive and "env" in vscode_config:
-                        click.secho("\nEnvironment Variables:", fg="yellow")
-                        for env_name in vscode_config["env"].keys():
-                            env_hidden = any(keyword in env_name.upper() for keyword in ["TOKEN", "SECRET", "KEY", "PASSWORD", "PASS"])
-                            
-                            # Check if already set in environment
-                            default_value = os.environ.get(env_name, "")
-                            
-                            # Prompt user
-                            env_value = click.prompt(
-                                f"  {env_name}", 
-                                default=default_value,
-                                hide_input=env_hidden,
-                                show_default=not env_hidden and bool(default_value)
-                            )
-                            
-                            vscode_config["env"][env_name] = env_value
+                    click.secho(f"\nInstalling server: {server_name}", fg="green")
+                    click.secho(f"  ID: {server_data.get('id')}", fg="blue")
                     
-                    # Install in VSCode settings
-                    from mcp_installer.registry import install_server_in_vscode
-                    result = install_server_in_vscode(vscode_config)
-                    if result.returncode == 0:
-                        click.secho(f"Server '{server_name}' installed successfully", fg="green")
-                        success_count += 1
-                    else:
-                        click.secho(f"Failed to install server: {result.stderr}", fg="red")
-                except Exception as e:
-                    click.secho(f"Error installing server: {e}", fg="red")
-            else:
-                click.secho(f"Error resolving server: {server_id}", fg="red")
+                    # Convert to VSCode configuration
+                    try:
+                        vscode_config = convert_to_vscode_config(server_data)
+                        
+                        # If in interactive mode and env vars are present, prompt for values
+                        if not no_interactive and "env" in vscode_config:
+                            prompt_for_env_vars(vscode_config)
+                        
+                        # Stage in the pending VSCode settings
+                        installer.install(vscode_config)
+                        click.secho(f"Server '{server_name}' staged for installation", fg="green")
+                        staged_count += 1
+                    except Exception as e:
+                        click.secho(f"Error installing server: {e}", fg="red")
+                else:
+                    click.secho(f"Error resolving server: {server_id}", fg="red")
                 
-        click.secho(f"\nInstalled {success_count} of {len(server_identifiers)} servers", fg="green")
+        # Only reached once settings.json has actually been written
+        click.secho(f"\nInstalled {staged_count} of {len(server_identifiers)} servers", fg="green")
         
     except Exception as e:
         click.secho(f"Error: {e}", fg="red", err=True)
         sys.exit(1)
 
 
+def _is_server_installed(
+    server_data: Dict,
+    installed_servers: AbstractSet[str],
+    installed_servers_lowercase: AbstractSet[str]
+) -> bool:
+    """Check whether a registry server matches any of the installed server identifiers."""
+    registry_name = server_data.get("name", "")
+    server_name = registry_name.split("/")[-1] if "/" in registry_name else registry_name
+    
+    # First check the server name, the full registry name and the name with the command appended
+    if not installed_servers.isdisjoint((server_name, registry_name, f"{server_name} (npx)")):
+        return True
+    
+    # Then match case-insensitively on the names, the figma context server
+    # special case and the name of each package
+    server_name_lowercase = server_name.lower()
+    candidates = {server_name_lowercase, registry_name.lower(), f"figma-{server_name_lowercase}"}
+    candidates.update(
+        pkg["name"].lower() for pkg in server_data.get("packages", []) if pkg.get("name")
+    )
+    return not installed_servers_lowercase.isdisjoint(candidates)
+
+
 @config_commands.command('verify')
 @click.option('--config-file', default='mcp.yml', help='Path to MCP config file')
-def verify_config(config_file):
+@_refresh_option
+def verify_config(config_file, refresh):
     """Verify that required MCP servers from config are installed."""
     try:
-        import os
-        import time
-        import threading
-        import itertools
         from mcp_installer.config import find_mcp_config_file, load_mcp_config, resolve_servers_from_registry_batch
         from mcp_installer.registry import MCPRegistryClient, get_registry_url
+        from mcp_installer.cache import RegistryCache
         
         # Find the config file
         config_path = Path(config_file) if os.path.exists(config_file) else find_mcp_config_file(config_file)
@@ -622,94 +747,33 @@ def verify_config(config_file):
         
         # Set up registry client
         registry_url = get_registry_url()
-        registry_client = MCPRegistryClient(registry_url)
-        
-        # Set up progress spinner
-        done_loading = False
-        def spinner_task():
-            spinner = itertools.cycle(['⣾', '⣽', '⣻', '⢿', '⡿', '⣟', '⣯', '⣷'])
-            while not done_loading:
-                click.echo(f"\r{next(spinner)} Checking {len(config['servers'])} MCP servers...", nl=False)
-                time.sleep(0.1)
-            # Clear the spinner line when done
-            click.echo("\r" + " " * 40 + "\r", nl=False)
-            
-        # Start spinner in background thread
-        spinner_thread = threading.Thread(target=spinner_task)
-        spinner_thread.daemon = True
-        spinner_thread.start()
+        registry_client = MCPRegistryClient(registry_url, cache=RegistryCache(refresh=refresh))
         
-        try:
-            # Find VSCode settings
-            vscode_settings_path = find_settings_file()
-            installed_servers = extract_mcp_servers(vscode_settings_path)
-            
-            # Get all server details in one batch operation for better performance
-            server_identifiers = config["servers"]
-            
-            server_details = resolve_servers_from_registry_batch(registry_client, server_identifiers)
-            
-            # Check which servers are missing
-            missing_servers = []
-            
-            # For debugging, let's print a summary of installed servers
-            click.secho(f"\nInstalled servers: {len(installed_servers)}", fg="blue")
-            
-            for server_id, server_data in server_details.items():
-                if server_data is None:
-                    # This should not happen due to how resolve_servers_from_registry_batch works,
-                    # but we keep it as a safety check
-                    missing_servers.append(server_id)
-                    continue
-                    
-                # Find all package identifiers for this server
-                packages = server_data.get("packages", [])
-                found = False
-                
-                # First check if the server name or identifier itself is in the installed servers
-                registry_name = server_data.get("name", "")
-                server_name = registry_name.split("/")[-1] if "/" in registry_name else registry_name
-                
-                # Also check for server name with the command appended
-                server_name_with_npx = f"{server_name} (npx)"
-                
-                if server_name in installed_servers:
-                    found = True
-                elif registry_name in installed_servers:
-                    found = True
-                elif server_name_with_npx in installed_servers:
-                    found = True
-                else:
-                    # Also check the short name of the registry package for NPM packages
-                    registry_short_name = server_name.lower() if server_name else ""
-                    server_name_lowercase = server_name.lower() if server_name else ""
-                    registry_name_lowercase = registry_name.lower() if registry_name else ""
-                    
-                    # Search with case insensitivity for more flexible matching
-                    installed_servers_lowercase = {s.lower() for s in installed_servers}
-                    
-                    if server_name_lowercase in installed_servers_lowercase:
-                        found = True
-                    elif registry_name_lowercase in installed_servers_lowercase:
-                        found = True
-                    elif f"figma-{server_name_lowercase}" in installed_servers_lowercase:
-                        # Special case handling for figma context servers
-                        found = True
-                    else:
-                        # If not found by name, check each package
-                        for pkg in packages:
-                            name = pkg.get("name")
-                            name_lowercase = name.lower() if name else ""
-                            if name and name_lowercase in installed_servers_lowercase:
-                                found = True
-                                break
-                
-                if not found:
-                    missing_servers.append(server_id)
-        finally:
-            # Stop the spinner
-            done_loading = True
-            spinner_thread.join(0.5)  # Wait for spinner to clean up
+        # Find VSCode settings
+        vscode_settings_path = find_settings_file()
+        installed_servers = extract_mcp_servers(vscode_settings_path)
+        
+        # Get all server details in one batch operation for better performance
+        server_identifiers = config["servers"]
+        with _status_line(f"Checking {len(server_identifiers)} MCP servers...") as progress:
+            server_details = resolve_servers_from_registry_batch(registry_client, server_identifiers, progress)
+        
+        # Check which servers are missing
+        missing_servers = []
+        
+        # For debugging, let's print a summary of installed servers
+        click.secho(f"\nInstalled servers: {len(installed_servers)}", fg="blue")
+        
+        # Lowercase once for the case-insensitive matching below
+        installed_servers_lowercase = {s.lower() for s in installed_servers}
+        
+        for server_id, server_data in server_details.items():
+            if server_data is None:
+                # This should not happen due to how resolve_servers_from_registry_batch works,
+                # but we keep it as a safety check
+                missing_servers.append(server_id)
+            elif not _is_server_installed(server_data, installed_servers, installed_servers_lowercase):
+                missing_servers.append(server_id)
         
         # Report results
         if missing_servers:
@@ -744,12 +808,13 @@ def init_config(output):
         # Create config
         config = {
             "version": "1.0",
-            "servers": list(installed_servers)
+            "servers": sorted(installed_servers)
         }
         
-        # Write config file
+        # Write config file, preferring the libyaml-backed dumper when PyYAML was built with it
+        dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
         with open(output, 'w') as f:
-            yaml.dump(config, f, default_flow_style=False, sort_keys=False)
+            yaml.dump(config, f, Dumper=dumper, default_flow_style=False, sort_keys=False)
             
         click.secho(f"Created MCP config file: {output}", fg="green")
         click.secho(f"Found {len(installed_servers)} installed servers", fg="green")
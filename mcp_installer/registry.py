@@ -5,15 +5,33 @@ MCP Registry Client
 This module provides functionality to interact with the MCP Registry API.
 """
 
+import errno
+import hashlib
 import json
 import os
 import subprocess
-from typing import Dict, List, Optional, Any, Union
-import requests
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Any, Union
+from urllib.parse import urlencode
+
+from mcp_installer.cache import RegistryCache, parse_cache_control
 
 
 DEFAULT_REGISTRY_URL = "https://demo.registry.azure-mcp.net"
 
+# Upper bound on concurrent registry requests (and pooled connections), kept
+# low enough not to trip the registry's rate limiting during batch lookups
+MAX_CONCURRENT_REQUESTS = 6
+
+# (connect, read) timeouts in seconds for registry requests
+REQUEST_TIMEOUT = (3, 10)
+
+# Package registries convert_to_vscode_config prefers, best first
+_PACKAGE_PREFERENCE = {"docker": 0, "npm": 1}
+
 
 def get_registry_url() -> str:
     """Get the MCP Registry URL from environment variable or default"""
@@ -25,12 +43,139 @@ def get_vscode_path() -> str:
     return os.environ.get("MCP_VSCODE_PATH", "code")
 
 
+def _max_age(headers: Dict[str, str], default: Optional[int] = None) -> Optional[int]:
+    """Get the freshness lifetime from a response's Cache-Control header"""
+    directives = parse_cache_control(headers.get("Cache-Control"))
+    if "no-cache" in directives:
+        # Cacheable, but must be revalidated before every use
+        return 0
+    try:
+        return int(directives["max-age"])
+    except (KeyError, TypeError, ValueError):
+        return default
+
+
 class MCPRegistryClient:
     """Client for interacting with the MCP Registry API"""
     
-    def __init__(self, registry_url: Optional[str] = None):
-        """Initialize the registry client with an optional custom URL"""
+    def __init__(self, registry_url: Optional[str] = None, cache: Optional[RegistryCache] = None):
+        """Initialize the registry client with an optional custom URL and response cache"""
         self.registry_url = registry_url or get_registry_url()
+        self.cache = cache
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._index_cache = None
+        
+    @property
+    def session(self):
+        """HTTP session shared by all requests of this client, created on first use"""
+        with self._session_lock:
+            if self._session is None:
+                # Imported lazily: requests dominates import time, and responses
+                # served from the cache never need it
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+                
+                # Reuse TCP/TLS connections across requests, including concurrent ones,
+                # and retry transient gateway errors with a short backoff
+                self._session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=MAX_CONCURRENT_REQUESTS,
+                    pool_maxsize=MAX_CONCURRENT_REQUESTS,
+                    max_retries=Retry(
+                        total=3,
+                        backoff_factor=0.2,
+                        status_forcelist=[502, 503, 504],
+                        allowed_methods=["GET"],
+                        raise_on_status=False
+                    )
+                )
+                self._session.mount("https://", adapter)
+                self._session.mount("http://", adapter)
+            return self._session
+        
+    def close(self) -> None:
+        """Close the pooled HTTP connections, if any were opened"""
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+        
+    def __enter__(self) -> "MCPRegistryClient":
+        return self
+        
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+        
+    def _get_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        Issue a GET request and decode the JSON body, going through the cache if configured
+        
+        Fresh cache entries are returned without touching the network. Stale
+        entries are revalidated with If-None-Match / If-Modified-Since so an
+        unchanged resource only costs a 304 response, and are still served if
+        the registry is unreachable or answers with a server error.
+        Cache-Control 'no-store', 'no-cache' and 'max-age' are honoured.
+        
+        Args:
+            url: Absolute URL to fetch
+            params: Optional query string parameters
+            
+        Returns:
+            Decoded JSON response body
+        """
+        if self.cache is None:
+            response = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            return response.json()
+        
+        from requests import RequestException
+        
+        key = f"{url}?{urlencode(sorted(params.items()))}" if params else url
+        entry = self.cache.get(key)
+        if entry is not None and self.cache.is_fresh(entry):
+            return entry["body"]
+        
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        
+        try:
+            response = self.session.get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
+            if entry is not None and response.status_code == 304:
+                # Unchanged on the server, restart the TTL on the cached body
+                self.cache.set(
+                    key,
+                    entry["body"],
+                    entry.get("etag"),
+                    entry.get("last_modified"),
+                    _max_age(response.headers, entry.get("max_age"))
+                )
+                return entry["body"]
+            response.raise_for_status()
+        except RequestException as e:
+            # Stale-if-error: an outdated answer beats no answer when the
+            # registry is down, but client errors (e.g. 404) are still raised
+            status = getattr(e.response, "status_code", None)
+            if entry is not None and (status is None or status >= 500):
+                return entry["body"]
+            raise
+        
+        body = response.json()
+        directives = parse_cache_control(response.headers.get("Cache-Control"))
+        if "no-store" not in directives:
+            self.cache.set(
+                key,
+                body,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                max_age=_max_age(response.headers)
+            )
+        return body
         
     def list_servers(self, limit: int = 30, cursor: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -47,9 +192,7 @@ class MCPRegistryClient:
         if cursor:
             params["cursor"] = cursor
         
-        response = requests.get(f"{self.registry_url}/v0/servers", params=params)
-        response.raise_for_status()
-        return response.json()
+        return self._get_json(f"{self.registry_url}/v0/servers", params=params)
         
     def get_server(self, server_id: str) -> Dict[str, Any]:
         """
@@ -61,9 +204,7 @@ class MCPRegistryClient:
         Returns:
             Dictionary with server details
         """
-        response = requests.get(f"{self.registry_url}/v0/servers/{server_id}")
-        response.raise_for_status()
-        return response.json()
+        return self._get_json(f"{self.registry_url}/v0/servers/{server_id}")
         
     def search_servers(self, query: str) -> List[Dict[str, Any]]:
         """
@@ -84,29 +225,55 @@ class MCPRegistryClient:
         
         # Client-side filtering based on query
         query = query.lower()
-        matches = []
         
-        for server in servers:
-            name = server.get("name", "").lower()
-            description = server.get("description", "").lower()
-            
-            # Exact name match (case-insensitive)
-            # - io.github.felores/github will match exactly "io.github.felores/github"
-            # - "github" will not match "io.github.felores/github"
-            name_match = query == name
-            
-            # Check if query matches either the name exactly or is found in the description
-            if name_match or query in description:
-                matches.append(server)
-                
-        return matches
+        # Exact name match (case-insensitive)
+        # - io.github.felores/github will match exactly "io.github.felores/github"
+        # - "github" will not match "io.github.felores/github"
+        # Otherwise the query must be found in the description
+        return [
+            server for server, name, description in self._search_index(servers)
+            if query == name or query in description
+        ]
+
+    def _search_index(self, servers: List[Dict[str, Any]]) -> List[tuple]:
+        """
+        Get (server, lowercase name, lowercase description) entries for a server list
+        
+        The index is rebuilt only when list_servers returns a different list,
+        so repeated searches against a cached listing don't lowercase every
+        server again.
+        """
+        cached = self._index_cache
+        if cached is not None and cached[0] is servers:
+            return cached[1]
+        
+        index = [
+            (server, server.get("name", "").lower(), server.get("description", "").lower())
+            for server in servers
+        ]
+        # Hold on to the list itself so its identity can't be reused
+        self._index_cache = (servers, index)
+        return index
 
-    def batch_search_servers(self, identifiers: List[str]) -> Dict[str, Dict[str, Any]]:
+    def _get_server_or_none(self, server_id: str) -> Optional[Dict[str, Any]]:
+        """Get details for a server, returning None instead of raising on failure"""
+        try:
+            return self.get_server(server_id)
+        except Exception:
+            return None
+
+    def batch_search_servers(
+        self,
+        identifiers: List[str],
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, Dict[str, Any]]:
         """
         Search for multiple servers in one operation, minimizing network requests
         
         Args:
             identifiers: List of server identifiers (IDs or names)
+            progress: Optional callback invoked with (completed, total) as each
+                server detail request finishes
             
         Returns:
             Dictionary mapping identifiers to their server details, or None if not found
@@ -121,62 +288,45 @@ class MCPRegistryClient:
             if not cursor:
                 break
         
-        # Build maps for quick lookups
+        # Build maps for quick lookups; the lowercase map keeps the first
+        # server with a given name, as a linear scan would
         id_map = {server.get("id"): server for server in all_servers}
         name_map = {server.get("name"): server for server in all_servers}
+        lower_name_map = {}
+        for server in all_servers:
+            lower_name_map.setdefault(server.get("name", "").lower(), server)
         
-        # Process all identifiers using the locally-cached data
+        # Resolve every identifier to a server ID using the locally-cached data
         server_details = {}
-        server_ids_to_fetch = []
+        identifier_ids = {}
         
         for identifier in identifiers:
-            # Check if identifier is an ID we already have
-            if identifier in id_map:
-                server_ids_to_fetch.append(identifier)
-                continue
-                
-            # Check if identifier is a name
-            if identifier in name_map:
-                server_ids_to_fetch.append(name_map[identifier].get("id"))
-                continue
-                
-            # If not found by exact match, try case-insensitive search in the local data
-            identifier_lower = identifier.lower()
-            found = False
-            
-            for server in all_servers:
-                if server.get("name", "").lower() == identifier_lower:
-                    server_ids_to_fetch.append(server.get("id"))
-                    found = True
-                    break
-                    
-            if not found:
+            server = id_map.get(identifier) or name_map.get(identifier) or lower_name_map.get(identifier.lower())
+            if server is None:
                 # Server not found at all - we'll return None for this one
                 server_details[identifier] = None
+            else:
+                identifier_ids[identifier] = server.get("id")
+        
+        # Make one request per unique server ID we need to fully resolve, issued
+        # concurrently since the lookups are independent and latency-bound
+        unique_ids = list(dict.fromkeys(identifier_ids.values()))
+        fetched_servers = {}
+        if unique_ids:
+            with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_REQUESTS, len(unique_ids))) as executor:
+                futures = {executor.submit(self._get_server_or_none, server_id): server_id for server_id in unique_ids}
+                # Report progress as responses land rather than in submission order
+                for completed, future in enumerate(as_completed(futures), 1):
+                    fetched_servers[futures[future]] = future.result()
+                    if progress:
+                        progress(completed, len(unique_ids))
         
-        # Make one request per unique server ID we need to fully resolve
-        # This is still more efficient than one per identifier
-        for server_id in set(server_ids_to_fetch):
-            try:
-                server_data = self.get_server(server_id)
-                # Map this resolved server to all identifiers that match it
-                for identifier in identifiers:
-                    # Check if this identifier led to this server ID
-                    if identifier in id_map and id_map[identifier].get("id") == server_id:
-                        server_details[identifier] = server_data
-                    elif identifier in name_map and name_map[identifier].get("id") == server_id:
-                        server_details[identifier] = server_data
-                    else:
-                        # Search by lowercase name
-                        identifier_lower = identifier.lower()
-                        for server in all_servers:
-                            if server.get("name", "").lower() == identifier_lower and server.get("id") == server_id:
-                                server_details[identifier] = server_data
-                                break
-            except Exception:
-                # If we fail to get a specific server, continue with the next one
-                # Any identifiers that were supposed to use this server will remain unmapped
-                pass
+        # Map each resolved server back to the identifiers that led to it. If we
+        # failed to get a specific server, its identifiers remain unmapped
+        for identifier, server_id in identifier_ids.items():
+            server_data = fetched_servers.get(server_id)
+            if server_data is not None:
+                server_details[identifier] = server_data
                 
         return server_details
 
@@ -209,37 +359,27 @@ def convert_to_vscode_config(server_data: Dict[str, Any]) -> Dict[str, Any]:
     if not packages:
         raise ValueError("Server has no package information")
         
-    # Prefer certain package types in this order: docker, npm, other
+    # Prefer certain package types in this order: docker, npm, then the first
+    # package, in a single pass that stops at the first docker package
     package = None
-    
-    # First try to find a docker package
+    package_rank = len(_PACKAGE_PREFERENCE)
     for pkg in packages:
-        if pkg.get("registry_name") == "docker":
-            package = pkg
-            break
-            
-    # If no docker package, try npm
-    if package is None:
-        for pkg in packages:
-            if pkg.get("registry_name") == "npm":
-                package = pkg
+        rank = _PACKAGE_PREFERENCE.get(pkg.get("registry_name"), len(_PACKAGE_PREFERENCE))
+        if package is None or rank < package_rank:
+            package, package_rank = pkg, rank
+            if rank == 0:
                 break
-                
-    # If still no package, use the first one
-    if package is None and packages:
-        package = packages[0]
-        
-    if package is None:
-        raise ValueError("No usable package found in server data")
         
     # Set command based on package type
     registry_name = package.get("registry_name", "").lower()
     
+    env_vars = package.get("environment_variables", [])
+    
     # Get runtime arguments with their value_hints
-    runtime_args = []
-    for arg in package.get("runtime_arguments", []):
-        if arg.get("type") == "positional" and arg.get("value_hint"):
-            runtime_args.append(arg.get("value_hint"))
+    runtime_args = [
+        arg["value_hint"] for arg in package.get("runtime_arguments", [])
+        if arg.get("type") == "positional" and arg.get("value_hint")
+    ]
     
     if registry_name == "docker":
         config["command"] = "docker"
@@ -255,7 +395,6 @@ def convert_to_vscode_config(server_data: Dict[str, Any]) -> Dict[str, Any]:
             args = ["run", "-i", "--rm"]
             
             # Add environment variable flags if needed
-            env_vars = package.get("environment_variables", [])
             for env in env_vars:
                 env_name = env.get("name")
                 if env_name:
@@ -285,7 +424,6 @@ def convert_to_vscode_config(server_data: Dict[str, Any]) -> Dict[str, Any]:
             config["args"] = [package.get("name")]
         
     # Add environment variables to config if any
-    env_vars = package.get("environment_variables", [])
     if env_vars:
         config["env"] = {}
         for env in env_vars:
@@ -297,36 +435,49 @@ def convert_to_vscode_config(server_data: Dict[str, Any]) -> Dict[str, Any]:
     return config
 
 
-def install_server_in_vscode(config: Dict[str, Any], scope: str = "user") -> subprocess.CompletedProcess:
+def read_vscode_settings(settings_path: Path) -> Dict[str, Any]:
     """
-    Install an MCP server by directly modifying the VS Code settings.json file
+    Read the VS Code settings.json file for modification
     
     Args:
-        config: VS Code server configuration
-        scope: Installation scope ('user' or 'workspace')
+        settings_path: Path to settings.json
         
     Returns:
-        CompletedProcess instance with return code and output (simulated for compatibility)
+        Parsed settings, safe to mutate
+        
+    Raises:
+        ValueError: If the file is not valid JSON once comments are removed
     """
-    from mcp_installer.main import find_settings_file
-    import re
-    
-    # Get settings file path
-    settings_path = find_settings_file()
+    from mcp_installer.main import parse_jsonc
     
-    # Read the current settings file
-    with open(settings_path, 'r') as f:
+    with open(settings_path, 'rb') as f:
         content = f.read()
     
-    # Parse the JSON, handling comments in the file
-    content_no_comments = re.sub(r'//.*$', '', content, flags=re.MULTILINE)
+    # Parse the JSON, handling comments in the file without touching '//' in strings
     try:
-        settings = json.loads(content_no_comments)
-    except json.JSONDecodeError as e:
+        return parse_jsonc(content)
+    except ValueError as e:
         raise ValueError(f"Failed to parse settings file: {e}") from e
+
+
+def add_server_to_settings(settings: Dict[str, Any], config: Dict[str, Any]) -> str:
+    """
+    Add or update an MCP server entry in parsed VS Code settings
     
-    # Extract server name
-    server_name = config.get("name", f"server-{hash(json.dumps(config))}")
+    Args:
+        settings: Parsed settings.json, modified in place
+        config: VS Code server configuration
+        
+    Returns:
+        Name the server was stored under
+    """
+    # Extract server name, falling back to a digest of the config that is
+    # stable across runs (hash() is salted per process), so reinstalling the
+    # same unnamed server updates its entry instead of adding a duplicate
+    server_name = config.get("name")
+    if server_name is None:
+        canonical = json.dumps(config, sort_keys=True, separators=(",", ":"))
+        server_name = f"server-{hashlib.blake2b(canonical.encode('utf-8'), digest_size=8).hexdigest()}"
     
     # Ensure the MCP section exists
     if "mcp" not in settings:
@@ -346,11 +497,75 @@ def install_server_in_vscode(config: Dict[str, Any], scope: str = "user") -> sub
     if "env" in config:
         settings["mcp"]["servers"][server_name]["env"] = config["env"]
     
-    # Write the updated settings back to the file
-    # We need to preserve original formatting and comments, so we'll use a different approach
-    # Rather than completely overwriting, we'll append or modify the specific section
-    # First convert the section to JSON with nice formatting
-    server_config_json = json.dumps(settings["mcp"]["servers"][server_name], indent=4)
+    return server_name
+
+
+def write_vscode_settings(settings_path: Path, settings: Dict[str, Any]) -> None:
+    """
+    Write VS Code settings atomically
+    
+    The settings are serialized up front and swapped in with os.replace, so
+    VS Code never sees a half-written file. Only when the file can't be
+    replaced (EBUSY/EXDEV, e.g. a bind mount) is it rewritten in place.
+    
+    Args:
+        settings_path: Path to settings.json
+        settings: Settings to write
+    """
+    # Write next to the real file, so a symlinked settings.json (e.g. from a
+    # dotfiles manager) is updated through the link instead of replaced
+    settings_path = Path(settings_path).resolve()
+    data = json.dumps(settings, indent=4)
+    
+    fd, tmp_path = tempfile.mkstemp(dir=settings_path.parent, prefix=".settings-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(data)
+        # Keep the permissions of the file being replaced
+        try:
+            os.chmod(tmp_path, os.stat(settings_path).st_mode & 0o7777)
+        except FileNotFoundError:
+            pass
+        try:
+            os.replace(tmp_path, settings_path)
+            return
+        except OSError as e:
+            # settings.json can't always be replaced, e.g. when it is bind-mounted
+            # into a container on its own, so fall back to writing it in place below.
+            # Any other failure leaves the original file untouched.
+            if e.errno not in (errno.EBUSY, errno.EXDEV):
+                raise
+    finally:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+    
+    with open(settings_path, 'w') as f:
+        f.write(data)
+
+
+def install_server_in_vscode(config: Dict[str, Any], scope: str = "user") -> subprocess.CompletedProcess:
+    """
+    Install an MCP server by directly modifying the VS Code settings.json file
+    
+    Args:
+        config: VS Code server configuration
+        scope: Installation scope ('user' or 'workspace')
+        
+    Returns:
+        CompletedProcess instance with return code and output (simulated for compatibility)
+    """
+    from mcp_installer.main import find_settings_file
+    
+    # Get settings file path
+    settings_path = find_settings_file()
+    
+    # Read the current settings file
+    settings = read_vscode_settings(settings_path)
+    
+    # Add or update the server
+    server_name = add_server_to_settings(settings, config)
     
     # Create a simulated result for compatibility
     result = subprocess.CompletedProcess(
@@ -362,8 +577,7 @@ def install_server_in_vscode(config: Dict[str, Any], scope: str = "user") -> sub
     
     # Now write the modified content back to the file
     try:
-        with open(settings_path, 'w') as f:
-            json.dump(settings, f, indent=4)
+        write_vscode_settings(settings_path, settings)
         return result
     except Exception as e:
         result.returncode = 1
@@ -6,14 +6,17 @@ This module provides MCP server functionality for the MCP installer CLI commands
 allowing them to be accessed through the MCP protocol.
 """
 
+import asyncio
 import json
-import requests
+import threading
 from typing import Dict, List, Any, Optional
 
 from mcp.server.fastmcp import FastMCP
+from mcp_installer.cache import RegistryCache, get_cache_ttl
 from mcp_installer.main import find_settings_file, extract_mcp_servers, check_missing_servers
 from mcp_installer.registry import (
     MCPRegistryClient, 
+    REQUEST_TIMEOUT,
     convert_to_vscode_config, 
     install_server_in_vscode,
     get_registry_url
@@ -24,13 +27,45 @@ mcp = FastMCP(
     name="MCP Installer"
 )
 
+# How long registry responses are reused across tool calls, in seconds. A
+# shorter MCP_REGISTRY_CACHE_TTL still wins, so 0 disables caching here too
+REGISTRY_CACHE_TTL = 300
+
+# Shared by all tool calls so a quick series of requests (e.g. a search
+# followed by an install) doesn't hit the registry again for the same data.
+# Entries are keyed by URL and also kept on disk with their
+# ETag/Last-Modified, so after a restart stale entries are revalidated and
+# usually cost just a 304
+_registry_cache = RegistryCache(ttl=min(REGISTRY_CACHE_TTL, get_cache_ttl()))
+
+# Client reused across tool calls so pooled connections are kept alive
+_registry_client = None
+_registry_client_lock = threading.Lock()
+
+
+def _get_registry_client() -> MCPRegistryClient:
+    """Get the shared registry client, rebuilding it if MCP_REGISTRY_URL changed"""
+    global _registry_client
+    
+    registry_url = get_registry_url()
+    with _registry_client_lock:
+        if _registry_client is None or _registry_client.registry_url != registry_url:
+            old_client = _registry_client
+            _registry_client = MCPRegistryClient(registry_url, cache=_registry_cache)
+            # Release the pooled connections to the previous registry
+            if old_client is not None:
+                old_client.close()
+        return _registry_client
+
 
 @mcp.tool(description="List all MCP servers installed in VS Code")
-def list_servers() -> dict:
+async def list_servers() -> dict:
     """List all MCP servers currently installed in VS Code settings."""
     try:
         settings_path = find_settings_file()
-        installed_servers = extract_mcp_servers(settings_path)
+        # Settings IO runs on a worker thread so concurrent tool calls
+        # don't stall the event loop
+        installed_servers = await asyncio.to_thread(extract_mcp_servers, settings_path)
         
         servers_list = sorted(list(installed_servers))
         
@@ -48,25 +83,35 @@ def list_servers() -> dict:
 
 
 @mcp.tool(description="Check if specific MCP servers are installed in VS Code")
-def check_servers(servers: list[str]) -> dict:
+async def check_servers(servers: list[str], include_installed: bool = False) -> dict:
     """
     Verify MCP server installation in VSCode.
     
     Args:
         servers: List of MCP server identifiers to check
+        include_installed: Return every installed server rather than only the
+            requested ones that are installed
     """
     try:
         # Find and read settings file
         settings_path = find_settings_file()
-        installed_servers = extract_mcp_servers(settings_path)
+        installed_servers = await asyncio.to_thread(extract_mcp_servers, settings_path)
         
         # Check which servers are missing
         missing_servers = check_missing_servers(servers, installed_servers)
         
+        # Only send the full installed list when asked for, it can be far
+        # larger than the handful of servers being checked
+        if include_installed:
+            reported_servers = sorted(installed_servers)
+        else:
+            missing = set(missing_servers)
+            reported_servers = [server for server in servers if server not in missing]
+        
         # Return results
         return {
             "all_installed": len(missing_servers) == 0,
-            "installed_servers": list(installed_servers),
+            "installed_servers": reported_servers,
             "missing_servers": missing_servers
         }
     except Exception as e:
@@ -78,7 +123,7 @@ def check_servers(servers: list[str]) -> dict:
         }
 
 @mcp.tool(description="List all available MCP servers in the registry")
-def list_available_servers(limit: int = 30, cursor: Optional[str] = None) -> Dict[str, Any]:
+async def list_available_servers(limit: int = 30, cursor: Optional[str] = None) -> Dict[str, Any]:
     """
     List available MCP servers from the MCP Registry.
     
@@ -89,23 +134,25 @@ def list_available_servers(limit: int = 30, cursor: Optional[str] = None) -> Dic
     Returns:
         Dictionary with servers list and metadata
     """
+    client = _get_registry_client()
+    
     try:
-        client = MCPRegistryClient()
-        results = client.list_servers(limit=limit, cursor=cursor)
+        # Copy before annotating, the response may be shared through the cache
+        results = dict(await asyncio.to_thread(client.list_servers, limit=limit, cursor=cursor))
         
         # Add registry information to the response
-        results["registry_url"] = get_registry_url()
+        results["registry_url"] = client.registry_url
         return results
     except Exception as e:
         return {
             "error": str(e),
-            "registry_url": get_registry_url(),
+            "registry_url": client.registry_url,
             "servers": []
         }
 
 
 @mcp.tool(description="Get details about a specific MCP server")
-def get_server_details(server_id: str) -> Dict[str, Any]:
+async def get_server_details(server_id: str) -> Dict[str, Any]:
     """
     Get detailed information about a specific MCP server.
     
@@ -115,12 +162,14 @@ def get_server_details(server_id: str) -> Dict[str, Any]:
     Returns:
         Dictionary with server details
     """
+    client = _get_registry_client()
+    
     try:
-        client = MCPRegistryClient()
-        server_data = client.get_server(server_id)
+        # Copy before annotating, the response may be shared through the cache
+        server_data = dict(await asyncio.to_thread(client.get_server, server_id))
         
         # Add registry information to the response
-        server_data["registry_url"] = get_registry_url()
+        server_data["registry_url"] = client.registry_url
         
         # Add VS Code configuration preview
         try:
@@ -133,13 +182,13 @@ def get_server_details(server_id: str) -> Dict[str, Any]:
     except Exception as e:
         return {
             "error": str(e),
-            "registry_url": get_registry_url(),
+            "registry_url": client.registry_url,
             "server_id": server_id
         }
 
 
 @mcp.tool(description="Search for MCP servers by name or description")
-def search_servers(query: str) -> Dict[str, Any]:
+async def search_servers(query: str) -> Dict[str, Any]:
     """
     Search for MCP servers in the registry by name or description.
     
@@ -149,12 +198,13 @@ def search_servers(query: str) -> Dict[str, Any]:
     Returns:
         Dictionary with matching servers
     """
+    client = _get_registry_client()
+    
     try:
-        client = MCPRegistryClient()
-        servers = client.search_servers(query)
+        servers = await asyncio.to_thread(client.search_servers, query)
         
         return {
-            "registry_url": get_registry_url(),
+            "registry_url": client.registry_url,
             "query": query,
             "servers": servers,
             "count": len(servers)
@@ -162,7 +212,7 @@ def search_servers(query: str) -> Dict[str, Any]:
     except Exception as e:
         return {
             "error": str(e),
-            "registry_url": get_registry_url(),
+            "registry_url": client.registry_url,
             "query": query,
             "servers": [],
             "count": 0
@@ -170,7 +220,7 @@ def search_servers(query: str) -> Dict[str, Any]:
 
 
 @mcp.tool(description="Install an MCP server from the registry")
-def install_server(server_id: str = None, server_name: str = None) -> Dict[str, Any]:
+async def install_server(server_id: str = None, server_name: str = None) -> Dict[str, Any]:
     """
     Install an MCP server from the registry to VS Code.
     
@@ -181,6 +231,8 @@ def install_server(server_id: str = None, server_name: str = None) -> Dict[str,
     Returns:
         Dictionary with installation result
     """
+    client = _get_registry_client()
+    
     try:
         if not server_id and not server_name:
             return {
@@ -188,43 +240,44 @@ def install_server(server_id: str = None, server_name: str = None) -> Dict[str,
                 "error": "Either server_id or server_name must be provided"
             }
             
-        client = MCPRegistryClient()
-        
         # Find server by ID or name
         server_data = None
         if server_id:
-            server_data = client.get_server(server_id)
+            server_data = await asyncio.to_thread(client.get_server, server_id)
         elif server_name:
             # Find by name (search for it)
-            servers = client.search_servers(server_name)
+            servers = await asyncio.to_thread(client.search_servers, server_name)
             if servers:
-                # Use the first match
-                server_data = client.get_server(servers[0]["id"])
+                # Use the first match, skipping the detail request when the
+                # search result already carries the package information
+                server_data = servers[0]
+                if "packages" not in server_data:
+                    server_data = await asyncio.to_thread(client.get_server, server_data["id"])
             else:
                 return {
                     "success": False,
                     "error": f"No server found with name '{server_name}'",
-                    "registry_url": get_registry_url()
+                    "registry_url": client.registry_url
                 }
         
         if not server_data:
             return {
                 "success": False,
                 "error": "Server not found",
-                "registry_url": get_registry_url()
+                "registry_url": client.registry_url
             }
             
         # Convert registry data to VS Code configuration
         vscode_config = convert_to_vscode_config(server_data)
         
         # Install the server
-        result = install_server_in_vscode(vscode_config)
+        result = await asyncio.to_thread(install_server_in_vscode, vscode_config)
         
         return {
             "success": True,
             "message": f"Installed '{server_data.get('name', '')}' successfully",
             "server_id": server_data.get("id", ""),
-            "registry_url": get_registry_url(),
+            "registry_url": client.registry_url,
             "command_output": result.stdout,
             "vscode_config": vscode_config
         }
@@ -232,30 +285,33 @@ def install_server(server_id: str = None, server_name: str = None) -> Dict[str,
         return {
             "success": False,
             "error": str(e),
-            "registry_url": get_registry_url()
+            "registry_url": client.registry_url
         }
 
 
 @mcp.tool(description="Show registry information")
-def get_registry_info() -> Dict[str, Any]:
+async def get_registry_info() -> Dict[str, Any]:
     """
     Get information about the currently configured MCP Registry.
     
     Returns:
         Dictionary with registry information
     """
-    registry_url = get_registry_url()
+    client = _get_registry_client()
+    registry_url = client.registry_url
     
     try:
         # Check if registry is accessible
-        client = MCPRegistryClient()
-        ping_response = requests.get(f"{registry_url}/v0/health")
+        ping_response = await asyncio.to_thread(
+            client.session.get, f"{registry_url}/v0/health", timeout=REQUEST_TIMEOUT
+        )
         ping_response.raise_for_status()
+        health_check = ping_response.json()
         
         return {
             "registry_url": registry_url,
             "status": "online",
-            "health_check": ping_response.json(),
+            "health_check": health_check,
             "message": "MCP Registry is accessible"
         }
     except Exception as e:
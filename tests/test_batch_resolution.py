@@ -47,7 +47,7 @@ class TestBatchServerResolution(unittest.TestCase):
         self.assertEqual(result, server_details)
         
         # Verify the client was called with the right arguments
-        mock_client.batch_search_servers.assert_called_once_with(server_identifiers)
+        mock_client.batch_search_servers.assert_called_once_with(server_identifiers, progress=None)
     
     def test_resolve_servers_from_registry_batch_with_missing(self):
         """Test resolving servers in batch when some are missing."""
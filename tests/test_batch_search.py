@@ -9,7 +9,7 @@ from mcp_installer.registry import MCPRegistryClient
 class TestBatchSearchServersFunctionality(unittest.TestCase):
     """Test cases for the batch_search_servers method in MCPRegistryClient."""
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_batch_search_servers(self, mock_get):
         """Test batch_search_servers method with multiple identifiers."""
         # Mock response for list_servers
@@ -73,7 +73,8 @@ class TestBatchSearchServersFunctionality(unittest.TestCase):
             "non-existent-server"  # This one doesn't exist
         ]
         
-        result = client.batch_search_servers(identifiers)
+        progress = MagicMock()
+        result = client.batch_search_servers(identifiers, progress=progress)
         
         # Verify the results
         self.assertEqual(len(result), 4)
@@ -91,3 +92,67 @@ class TestBatchSearchServersFunctionality(unittest.TestCase):
         self.assertEqual(server_data["id"], "123")
         self.assertEqual(server_data["name"], "io.github.glips/figma-context-mcp")
         self.assertEqual(server_data["packages"][0]["name"], "package-123")
+        
+        # Progress is reported once per server detail request
+        self.assertEqual(progress.call_count, 3)
+        progress.assert_called_with(3, 3)
+
+    @patch('requests.Session.get')
+    def test_batch_search_servers_shares_lookups(self, mock_get):
+        """Test that an ID, a name and a differently-cased name for one server need one lookup."""
+        mock_list_response = MagicMock()
+        mock_list_response.json.return_value = {
+            "servers": [{"id": "123", "name": "io.github.glips/Figma-Context-MCP"}]
+        }
+        mock_server_response = MagicMock()
+        mock_server_response.json.return_value = {"id": "123", "packages": []}
+
+        def side_effect(url, **kwargs):
+            return mock_server_response if "/servers/" in url else mock_list_response
+
+        mock_get.side_effect = side_effect
+
+        client = MCPRegistryClient()
+        identifiers = ["123", "io.github.glips/Figma-Context-MCP", "io.github.glips/figma-context-mcp"]
+        result = client.batch_search_servers(identifiers)
+
+        self.assertEqual(result, {identifier: {"id": "123", "packages": []} for identifier in identifiers})
+        # One list request plus a single detail request
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('requests.Session.get')
+    def test_batch_search_servers_bounds_concurrency(self, mock_get):
+        """Test that detail lookups run concurrently but never more than the cap at once."""
+        import threading
+        import time
+        from mcp_installer.registry import MAX_CONCURRENT_REQUESTS
+
+        servers = [{"id": str(i), "name": f"server-{i}"} for i in range(MAX_CONCURRENT_REQUESTS * 2)]
+        mock_list_response = MagicMock()
+        mock_list_response.json.return_value = {"servers": servers}
+
+        lock = threading.Lock()
+        in_flight = [0]
+        peak = [0]
+
+        def side_effect(url, **kwargs):
+            if "/servers/" not in url:
+                return mock_list_response
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            time.sleep(0.02)
+            with lock:
+                in_flight[0] -= 1
+            response = MagicMock()
+            response.json.return_value = {"id": url.split("/")[-1], "packages": []}
+            return response
+
+        mock_get.side_effect = side_effect
+
+        client = MCPRegistryClient()
+        result = client.batch_search_servers([server["name"] for server in servers])
+
+        self.assertEqual(len(result), len(servers))
+        self.assertGreater(peak[0], 1)
+        self.assertLessEqual(peak[0], MAX_CONCURRENT_REQUESTS)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3.13
+"""
+Tests for the MCP Registry response cache
+"""
+
+from unittest.mock import patch, MagicMock
+
+from mcp_installer.cache import RegistryCache
+from mcp_installer.registry import MCPRegistryClient
+
+
+def _mock_response(body, status_code=200, headers=None):
+    """Build a mock requests.Response"""
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.json.return_value = body
+    response.raise_for_status.return_value = None
+    return response
+
+
+def test_cache_roundtrip(tmp_path):
+    """Test storing and reading back a cache entry."""
+    cache = RegistryCache(cache_dir=tmp_path, ttl=60)
+
+    assert cache.get("https://registry/v0/servers/123") is None
+
+    cache.set("https://registry/v0/servers/123", {"id": "123"}, etag='"abc"')
+    entry = cache.get("https://registry/v0/servers/123")
+
+    assert entry["body"] == {"id": "123"}
+    assert entry["etag"] == '"abc"'
+    assert cache.is_fresh(entry)
+
+
+def test_cache_disabled_with_zero_ttl(tmp_path):
+    """Test that a TTL of 0 never stores anything."""
+    cache = RegistryCache(cache_dir=tmp_path, ttl=0)
+    cache.set("key", {"id": "123"})
+
+    assert cache.get("key") is None
+
+
+def test_cache_keeps_recent_entries_in_memory(tmp_path):
+    """Test that entries are served from memory until the cache is cleared."""
+    cache = RegistryCache(cache_dir=tmp_path, ttl=60)
+    cache.set("key", {"id": "123"})
+
+    # Reading back does not need the file any more
+    for path in tmp_path.glob("*.json"):
+        path.unlink()
+    assert cache.get("key")["body"] == {"id": "123"}
+
+    cache.clear()
+    assert cache.get("key") is None
+
+
+def test_cache_without_persist_stays_in_memory(tmp_path):
+    """Test that a non-persistent cache never touches the cache directory."""
+    cache = RegistryCache(cache_dir=tmp_path / "cache", ttl=60, persist=False)
+    cache.set("key", {"id": "123"})
+
+    assert cache.get("key")["body"] == {"id": "123"}
+    assert not (tmp_path / "cache").exists()
+    assert RegistryCache(cache_dir=tmp_path / "cache", ttl=60, persist=False).get("key") is None
+
+
+@patch('requests.Session.get')
+def test_client_serves_fresh_entries_from_cache(mock_get, tmp_path):
+    """Test that a fresh cached response skips the network."""
+    mock_get.return_value = _mock_response({"id": "123", "name": "test-server"})
+
+    client = MCPRegistryClient("https://registry", cache=RegistryCache(cache_dir=tmp_path, ttl=60))
+    first = client.get_server("123")
+    second = client.get_server("123")
+
+    assert first == second == {"id": "123", "name": "test-server"}
+    mock_get.assert_called_once()
+
+
+@patch('requests.Session.get')
+def test_client_revalidates_stale_entries(mock_get, tmp_path):
+    """Test that a stale entry is revalidated with its ETag and reused on 304."""
+    cache = RegistryCache(cache_dir=tmp_path, ttl=60)
+    cache.set("https://registry/v0/servers/123", {"id": "123"}, etag='"abc"')
+
+    # Age the entry past its TTL
+    entry = cache.get("https://registry/v0/servers/123")
+    with patch('time.time', return_value=entry["stored_at"] + 120):
+        assert not cache.is_fresh(entry)
+
+        mock_get.return_value = _mock_response(None, status_code=304)
+        client = MCPRegistryClient("https://registry", cache=cache)
+        result = client.get_server("123")
+
+    assert result == {"id": "123"}
+    assert mock_get.call_args.kwargs["headers"] == {"If-None-Match": '"abc"'}
+    assert cache.is_fresh(cache.get("https://registry/v0/servers/123"))
+
+
+@patch('requests.Session.get')
+def test_client_serves_stale_entries_when_registry_is_down(mock_get, tmp_path):
+    """Test that a stale entry is returned if the registry can't be reached."""
+    import requests
+
+    cache = RegistryCache(cache_dir=tmp_path, ttl=60)
+    cache.set("https://registry/v0/servers/123", {"id": "123"})
+
+    entry = cache.get("https://registry/v0/servers/123")
+    with patch('time.time', return_value=entry["stored_at"] + 120):
+        mock_get.side_effect = requests.ConnectionError("registry down")
+        client = MCPRegistryClient("https://registry", cache=cache)
+        result = client.get_server("123")
+
+    assert result == {"id": "123"}
+
+
+@patch('requests.Session.get')
+def test_client_honours_cache_control(mock_get, tmp_path):
+    """Test that no-store responses are not cached and max-age caps the TTL."""
+    cache = RegistryCache(cache_dir=tmp_path, ttl=3600)
+    client = MCPRegistryClient("https://registry", cache=cache)
+
+    mock_get.return_value = _mock_response({"id": "1"}, headers={"Cache-Control": "no-store"})
+    client.get_server("1")
+    assert cache.get("https://registry/v0/servers/1") is None
+
+    mock_get.return_value = _mock_response({"id": "2"}, headers={"Cache-Control": "public, max-age=10"})
+    client.get_server("2")
+    entry = cache.get("https://registry/v0/servers/2")
+    assert entry["max_age"] == 10
+    with patch('time.time', return_value=entry["stored_at"] + 30):
+        assert not cache.is_fresh(entry)
+
+
+@patch('requests.Session.get')
+def test_client_revalidates_fresh_entries_on_refresh(mock_get, tmp_path):
+    """Test that refresh revalidates even fresh entries with their ETag."""
+    RegistryCache(cache_dir=tmp_path, ttl=60).set("https://registry/v0/servers/123", {"id": "123"}, etag='"abc"')
+
+    mock_get.return_value = _mock_response(None, status_code=304)
+    client = MCPRegistryClient("https://registry", cache=RegistryCache(cache_dir=tmp_path, ttl=60, refresh=True))
+
+    assert client.get_server("123") == {"id": "123"}
+    assert mock_get.call_args.kwargs["headers"] == {"If-None-Match": '"abc"'}
@@ -313,6 +313,33 @@ def test_registry_install_command_by_id(mock_install, mock_convert, mock_client_
     mock_install.assert_called_once_with(vscode_config)
 
 
+@patch('mcp_installer.registry.MCPRegistryClient')
+@patch('mcp_installer.registry.convert_to_vscode_config')
+@patch('mcp_installer.registry.install_server_in_vscode')
+def test_registry_install_command_by_name(mock_install, mock_convert, mock_client_class):
+    """Test that 'registry install' by name reuses a complete search result."""
+    # Setup mock client response
+    mock_client = mock_client_class.return_value
+    server_data = {
+        "id": "123e4567-e89b-12d3-a456-426614174000",
+        "name": "redis-mcp-server",
+        "packages": [{"registry_name": "docker", "name": "mcp/redis"}]
+    }
+    mock_client.search_servers.return_value = [server_data]
+    
+    vscode_config = {"name": "redis-mcp-server", "command": "docker", "args": ["run", "-i", "--rm", "mcp/redis"]}
+    mock_convert.return_value = vscode_config
+    
+    runner = CliRunner()
+    result = runner.invoke(cli, ['registry', 'install', 'redis'], input='y\n')
+    
+    # Verify the command executed successfully without a second lookup
+    assert result.exit_code == 0
+    assert "Server installed successfully" in result.output
+    mock_client.get_server.assert_not_called()
+    mock_convert.assert_called_once_with(server_data)
+
+
 @patch('mcp_installer.registry.MCPRegistryClient')
 def test_registry_install_command_by_name_multiple_matches(mock_client_class):
     """Test the 'registry install' command with name that matches multiple servers."""
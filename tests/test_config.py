@@ -58,6 +58,23 @@ def test_find_mcp_config_file_not_found():
                 assert result is None
 
 
+def test_find_mcp_config_file_sees_files_created_or_deleted_later():
+    """Test that find_mcp_config_file doesn't keep returning a stale result."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cwd = Path(tmpdir)
+        config_path = cwd / "mcp.yml"
+        
+        # Keep the search inside the temporary directory
+        with mock.patch('pathlib.Path.parents', new_callable=mock.PropertyMock, return_value=[]):
+            assert config.find_mcp_config_file(cwd=cwd) is None
+            
+            config_path.write_text("servers: []")
+            assert config.find_mcp_config_file(cwd=cwd) == config_path
+            
+            config_path.unlink()
+            assert config.find_mcp_config_file(cwd=cwd) is None
+
+
 def test_load_mcp_config():
     """Test loading a valid MCP config file."""
     test_data = {
@@ -130,6 +147,21 @@ def test_resolve_server_from_registry_not_found():
         config.resolve_server_from_registry(mock_client, "nonexistent-server")
 
 
+def test_resolve_server_from_registry_by_name():
+    """Test that name lookups go straight to search without a failing ID lookup."""
+    mock_client = mock.MagicMock()
+    mock_client.search_servers.return_value = [
+        {"id": "other-id", "name": "io.github.other/azure-mcp"},
+        {"id": "428785c9-039e-47f6-9636-cbe289cc1990", "name": "io.github.azure/azure-mcp"},
+    ]
+    mock_client.get_server.return_value = {"id": "428785c9-039e-47f6-9636-cbe289cc1990"}
+    
+    result = config.resolve_server_from_registry(mock_client, "io.github.azure/azure-mcp")
+    
+    mock_client.get_server.assert_called_once_with("428785c9-039e-47f6-9636-cbe289cc1990")
+    assert result["id"] == "428785c9-039e-47f6-9636-cbe289cc1990"
+
+
 @mock.patch('mcp_installer.config.convert_to_vscode_config')
 @mock.patch('mcp_installer.config.install_server_in_vscode')
 @mock.patch('mcp_installer.config.resolve_server_from_registry')
@@ -348,3 +380,43 @@ def test_install_server_from_registry_installation_failure(mock_secho, mock_reso
     
     # Verify the result is False
     assert result is False
+
+
+def test_batch_installer_writes_settings_once():
+    """Test that BatchInstaller applies all installs with a single write."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        settings_path = Path(tmpdir) / "settings.json"
+        settings_path.write_text('{\n    // editor settings\n    "editor.fontSize": 14\n}')
+        
+        with mock.patch('mcp_installer.config.write_vscode_settings',
+                        wraps=config.write_vscode_settings) as mock_write:
+            with config.BatchInstaller(settings_path) as installer:
+                installer.install({"name": "server1", "command": "docker", "args": ["run", "image1"]})
+                installer.install({"name": "server2", "command": "npx", "args": ["pkg"], "env": {"TOKEN": "x"}})
+        
+        mock_write.assert_called_once()
+        settings = json.loads(settings_path.read_text())
+        assert settings["editor.fontSize"] == 14
+        assert settings["mcp"]["servers"] == {
+            "server1": {"command": "docker", "args": ["run", "image1"]},
+            "server2": {"command": "npx", "args": ["pkg"], "env": {"TOKEN": "x"}},
+        }
+        assert os.listdir(tmpdir) == ["settings.json"]
+
+
+def test_batch_installer_keeps_original_error_when_write_fails(capsys):
+    """Test that a failed write on exit doesn't mask the error that ended the batch."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        settings_path = Path(tmpdir) / "settings.json"
+        settings_path.write_text('{}')
+        
+        with mock.patch('mcp_installer.config.write_vscode_settings',
+                        side_effect=OSError("disk full")) as mock_write:
+            with pytest.raises(KeyboardInterrupt):
+                with config.BatchInstaller(settings_path) as installer:
+                    installer.install({"name": "server1", "command": "npx", "args": ["pkg"]})
+                    raise KeyboardInterrupt
+        
+        # Servers staged before the error were still written out
+        mock_write.assert_called_once()
+        assert "Failed to update settings file: disk full" in capsys.readouterr().err
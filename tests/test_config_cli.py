@@ -213,6 +213,22 @@ def test_config_install_command(mock_registry_client, mock_vscode_settings, mock
                     assert args[1] == ["server1", "server2"]
 
 
+def test_config_install_reports_nothing_installed_when_write_fails(mock_registry_client, mock_vscode_settings, mock_mcp_config_file):
+    """Test that a failed settings write is not preceded by an install summary."""
+    server_data = {"id": "server1", "name": "server1", "packages": [{"registry_name": "npm", "name": "pkg"}]}
+    with mock.patch('mcp_installer.config.resolve_servers_from_registry_batch',
+                    return_value={"server1": server_data, "server2": server_data}), \
+            mock.patch('mcp_installer.config.write_vscode_settings', side_effect=OSError("read-only")):
+        runner = CliRunner()
+        result = runner.invoke(cli, ['config', 'install', '--no-interactive'])
+        
+    assert result.exit_code == 1
+    assert "staged for installation" in result.output
+    assert "installed successfully" not in result.output
+    assert "Installed 2 of 2 servers" not in result.output
+    assert "Failed to update settings file" in result.output
+
+
 def test_config_verify_command(mock_registry_client, mock_vscode_settings, mock_mcp_config_file):
     """Test the 'config verify' command."""
     # Mock load_mcp_config to ensure it returns the expected format
@@ -260,3 +276,5 @@ def test_config_init_command(mock_vscode_settings):
             assert "version" in config
             assert "servers" in config
             assert "docker-image1" in config["servers"]
+            # Servers are written in a stable order so the file doesn't churn between runs
+            assert config["servers"] == sorted(config["servers"])
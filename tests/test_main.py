@@ -4,9 +4,10 @@ import json
 import os
 import tempfile
 from pathlib import Path
+from unittest import mock
 
 import pytest
-from mcp_installer.main import extract_mcp_servers, check_missing_servers
+from mcp_installer.main import _extract_mcp_servers, extract_mcp_servers, check_missing_servers
 
 
 def test_extract_mcp_servers_no_servers():
@@ -199,3 +200,134 @@ def test_check_missing_servers():
     # All servers are missing
     required3 = ["server4:tag", "server5:tag"]
     assert check_missing_servers(required3, installed) == ["server4:tag", "server5:tag"]
+
+
+def test_extract_mcp_servers_picks_up_file_changes():
+    """Test that cached settings are re-read once the file changes."""
+    settings_content = {
+        "mcp": {
+            "servers": {
+                "custom-server": {
+                    "command": "uvx",
+                    "args": ["mcp-server-fetch"]
+                }
+            }
+        }
+    }
+    
+    with tempfile.NamedTemporaryFile(mode='w+', delete=False) as temp:
+        json.dump(settings_content, temp)
+        temp_path = temp.name
+    
+    try:
+        assert extract_mcp_servers(Path(temp_path)) == {"custom-server"}
+        
+        # Add a server and make sure the modification time moves forward
+        settings_content["mcp"]["servers"]["another-server"] = {"command": "uvx"}
+        with open(temp_path, 'w') as f:
+            json.dump(settings_content, f)
+        stat = os.stat(temp_path)
+        os.utime(temp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        
+        assert extract_mcp_servers(Path(temp_path)) == {"custom-server", "another-server"}
+    finally:
+        # Clean up
+        os.unlink(temp_path)
+
+
+def test_extract_mcp_servers_memory_mapped(monkeypatch):
+    """Test that large settings files are parsed through a memory map."""
+    monkeypatch.setattr("mcp_installer.main._MMAP_MIN_SIZE", 0)
+    
+    with tempfile.NamedTemporaryFile(mode='w+', delete=False) as temp:
+        temp.write('{\n    // MCP servers\n    "mcp": {"servers": {"fetch": {"command": "uvx"}}}\n}')
+        temp_path = temp.name
+    
+    try:
+        assert extract_mcp_servers(Path(temp_path)) == {"fetch"}
+    finally:
+        # Clean up
+        os.unlink(temp_path)
+
+
+def test_extract_mcp_servers_disk_cache(monkeypatch, tmp_path):
+    """Test that server identifiers of large settings files are cached on disk."""
+    monkeypatch.setattr("mcp_installer.main._SERVER_CACHE_MIN_SIZE", 0)
+    monkeypatch.setenv("MCP_INSTALLER_CACHE_DIR", str(tmp_path / "cache"))
+    
+    settings_path = tmp_path / "settings.json"
+    settings_path.write_text(json.dumps({
+        "mcp": {"servers": {"fetch": {"command": "npx", "args": ["@modelcontextprotocol/fetch"]}}}
+    }))
+    
+    assert extract_mcp_servers(settings_path) == {"@modelcontextprotocol/fetch"}
+    
+    # The cached result is used without parsing the file again, even by a
+    # fresh process that doesn't have it in memory
+    _extract_mcp_servers.cache_clear()
+    with mock.patch("mcp_installer.main._parse_settings_file") as mock_parse:
+        assert extract_mcp_servers(settings_path) == {"@modelcontextprotocol/fetch"}
+        mock_parse.assert_not_called()
+
+
+@pytest.mark.parametrize("body", [["not", "a", "dict"], {"servers": None}, "garbage"])
+def test_extract_mcp_servers_ignores_malformed_disk_cache(monkeypatch, tmp_path, body):
+    """Test that a malformed cache entry falls back to parsing the file."""
+    from mcp_installer.cache import RegistryCache
+    
+    monkeypatch.setattr("mcp_installer.main._SERVER_CACHE_MIN_SIZE", 0)
+    monkeypatch.setenv("MCP_INSTALLER_CACHE_DIR", str(tmp_path / "cache"))
+    
+    settings_path = tmp_path / "settings.json"
+    settings_path.write_text(json.dumps({
+        "mcp": {"servers": {"fetch": {"command": "npx", "args": ["@modelcontextprotocol/fetch"]}}}
+    }))
+    if isinstance(body, dict):
+        stat = settings_path.stat()
+        body = dict(body, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+    RegistryCache(cache_dir=tmp_path / "cache" / "settings").set(str(settings_path.resolve()), body)
+    
+    _extract_mcp_servers.cache_clear()
+    assert extract_mcp_servers(settings_path) == {"@modelcontextprotocol/fetch"}
+
+
+def test_extract_mcp_servers_reuses_result_until_file_changes(tmp_path):
+    """Test that unchanged settings are not re-read within a process."""
+    settings_path = tmp_path / "settings.json"
+    settings_path.write_text(json.dumps({"mcp": {"servers": {"a": {"command": "npx", "args": ["a"]}}}}))
+    
+    first = extract_mcp_servers(settings_path)
+    with mock.patch("mcp_installer.main._parse_settings_file") as mock_parse:
+        assert extract_mcp_servers(settings_path) is first
+        mock_parse.assert_not_called()
+    
+    settings_path.write_text(json.dumps({"mcp": {"servers": {"b": {"command": "npx", "args": ["bb"]}}}}))
+    assert extract_mcp_servers(settings_path) == {"bb"}
+
+
+def test_extract_mcp_servers_keeps_slashes_in_strings():
+    """Test that comment stripping leaves '//' and '/*' inside strings alone."""
+    settings_text = '''{
+    // Line comment
+    "editor.fontSize": 12, /* block
+    comment */
+    "mcp": {
+        "servers": {
+            "remote": {
+                "command": "npx",
+                "args": ["mcp-remote", "https://example.com/sse"],
+                "env": {"PATTERN": "a/*b*/c", "QUOTE": "say \\"//hi\\""}
+            }
+        }
+    }
+}'''
+    
+    with tempfile.NamedTemporaryFile(mode='w+', delete=False) as temp:
+        temp.write(settings_text)
+        temp_path = temp.name
+    
+    try:
+        assert extract_mcp_servers(Path(temp_path)) == {"https://example.com/sse"}
+    finally:
+        # Clean up
+        os.unlink(temp_path)
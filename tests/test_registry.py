@@ -5,13 +5,17 @@ Tests for MCP Registry Client functionality
 
 import json
 import os
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 
+from mcp_installer.cache import RegistryCache
 from mcp_installer.registry import (
     MCPRegistryClient,
     get_registry_url,
-    convert_to_vscode_config
+    add_server_to_settings,
+    convert_to_vscode_config,
+    read_vscode_settings
 )
 
 
@@ -55,7 +59,7 @@ class TestRegistryClientFunctions(unittest.TestCase):
 class TestMCPRegistryClient(unittest.TestCase):
     """Test cases for MCPRegistryClient class"""
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_list_servers(self, mock_get):
         """Test listing servers from the registry"""
         # Mock response
@@ -83,7 +87,7 @@ class TestMCPRegistryClient(unittest.TestCase):
         mock_get.assert_called_once()
         self.assertEqual(result["servers"][0]["name"], "Test Server")
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_search_servers_with_repo_paths(self, mock_get):
         """Test exact name matching for server search"""
         # Mock response with servers that have repository paths
@@ -147,6 +151,46 @@ class TestMCPRegistryClient(unittest.TestCase):
         self.assertEqual(len(results), 1)
         self.assertIn("123", [s["id"] for s in results])
 
+    @patch('requests.Session.get')
+    def test_search_servers_reuses_index(self, mock_get):
+        """Test that repeated searches against a cached listing share one lowercase index"""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.headers = {}
+        mock_response.json.return_value = {
+            "servers": [
+                {"id": "1", "name": "Redis", "description": "Key-value store"},
+                {"id": "2", "name": "Postgres", "description": "SQL database, not redis"}
+            ]
+        }
+        mock_get.return_value = mock_response
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            client = MCPRegistryClient(cache=RegistryCache(cache_dir=cache_dir, ttl=60))
+            self.assertEqual([s["id"] for s in client.search_servers("REDIS")], ["1", "2"])
+            index = client._index_cache[1]
+            self.assertEqual([s["id"] for s in client.search_servers("postgres")], ["2"])
+
+        self.assertIs(client._index_cache[1], index)
+        mock_get.assert_called_once()
+
+    @patch('requests.Session.get')
+    def test_requests_use_timeout_and_retries(self, mock_get):
+        """Test that requests carry a timeout and the session retries gateway errors"""
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"id": "123"}
+        mock_get.return_value = mock_response
+
+        with MCPRegistryClient() as client:
+            client.get_server("123")
+            retries = client.session.get_adapter("https://registry").max_retries
+
+        self.assertEqual(mock_get.call_args.kwargs["timeout"], (3, 10))
+        self.assertEqual(retries.total, 3)
+        self.assertIn(503, retries.status_forcelist)
+        # Leaving the context closes the pooled connections
+        self.assertIsNone(client._session)
+
 
 class TestConfigConversion(unittest.TestCase):
     """Test cases for configuration conversion functions"""
@@ -318,6 +362,49 @@ class TestConfigConversion(unittest.TestCase):
         expected_args = ["-y", "@azure/mcp@latest", "server", "start"]
         self.assertEqual(vscode_config["args"], expected_args)
 
+    def test_convert_prefers_docker_then_npm_packages(self):
+        """Test package selection order regardless of position in the list"""
+        pypi = {"registry_name": "pypi", "name": "mcp-server-pypi"}
+        npm = {"registry_name": "npm", "name": "mcp-server-npm"}
+        docker = {"registry_name": "docker", "name": "mcp/server"}
+
+        config = convert_to_vscode_config({"name": "org/server", "packages": [pypi, npm, docker]})
+        self.assertEqual(config["command"], "docker")
+        self.assertEqual(config["args"], ["run", "-i", "--rm", "mcp/server"])
+
+        config = convert_to_vscode_config({"name": "org/server", "packages": [pypi, npm]})
+        self.assertEqual(config["command"], "npx")
+        self.assertEqual(config["args"], ["mcp-server-npm"])
+
+        config = convert_to_vscode_config({"name": "org/server", "packages": [pypi]})
+        self.assertEqual(config["command"], "pypi")
+
+
+class TestVSCodeSettings(unittest.TestCase):
+    """Test cases for reading the VS Code settings file"""
+
+    def test_read_vscode_settings_strips_comments_only(self):
+        """Test that comments are removed while '//' inside strings survives"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            settings_path = os.path.join(tmpdir, "settings.json")
+            with open(settings_path, 'w') as f:
+                f.write('{\n    // proxy settings\n    "http.proxy": "http://proxy:8080", /* port */\n    "a": 1\n}')
+
+            settings = read_vscode_settings(settings_path)
+
+        self.assertEqual(settings, {"http.proxy": "http://proxy:8080", "a": 1})
+
+    def test_add_server_to_settings_names_unnamed_servers_stably(self):
+        """Test that an unnamed config maps to the same entry on every install"""
+        config = {"command": "npx", "args": ["pkg"], "env": {"B": "", "A": ""}}
+        reordered = {"env": {"A": "", "B": ""}, "args": ["pkg"], "command": "npx"}
+
+        settings = {}
+        name = add_server_to_settings(settings, config)
+        self.assertEqual(add_server_to_settings(settings, reordered), name)
+        self.assertRegex(name, r"^server-[0-9a-f]{16}$")
+        self.assertEqual(list(settings["mcp"]["servers"]), [name])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -3,6 +3,7 @@
 Tests for the MCP Server functionality.
 """
 
+import errno
 import unittest
 import json
 import tempfile
@@ -11,6 +12,9 @@ from pathlib import Path
 
 from mcp_installer.server import mcp
 
+# Real temp files for tests that patch tempfile.mkstemp
+_mkstemp = tempfile.mkstemp
+
 
 class TestMCPServer(unittest.TestCase):
     """Test cases for the MCP Server functionality"""
@@ -39,6 +43,90 @@ class TestMCPServer(unittest.TestCase):
         assert callable(install_server)
         assert callable(get_registry_info)
     
+    @patch('mcp_installer.server.extract_mcp_servers')
+    @patch('mcp_installer.server.find_settings_file')
+    def test_check_servers_tool(self, mock_find_settings, mock_extract):
+        """Test that the async check_servers tool reports missing servers"""
+        import asyncio
+        from mcp_installer.server import check_servers
+        
+        mock_find_settings.return_value = Path('/mock/path/to/settings.json')
+        mock_extract.return_value = frozenset({"server-a", "server-c"})
+        
+        result = asyncio.run(check_servers(["server-a", "server-b"]))
+        
+        mock_extract.assert_called_once_with(Path('/mock/path/to/settings.json'))
+        self.assertFalse(result["all_installed"])
+        # Only the requested servers are reported unless asked otherwise
+        self.assertEqual(result["installed_servers"], ["server-a"])
+        self.assertEqual(result["missing_servers"], ["server-b"])
+        
+        result = asyncio.run(check_servers(["server-a"], include_installed=True))
+        self.assertTrue(result["all_installed"])
+        self.assertEqual(result["installed_servers"], ["server-a", "server-c"])
+    
+    def _registry_client(self):
+        """Build a tool registry client whose cache lives in a temporary directory"""
+        from mcp_installer.cache import RegistryCache
+        from mcp_installer.registry import MCPRegistryClient
+        
+        cache_dir = self.enterContext(tempfile.TemporaryDirectory())
+        return MCPRegistryClient(cache=RegistryCache(cache_dir=Path(cache_dir), ttl=300))
+    
+    @patch('requests.Session.get')
+    def test_registry_responses_shared_across_tool_calls(self, mock_get):
+        """Test that repeated tool calls reuse cached registry responses"""
+        import asyncio
+        from mcp_installer.cache import RegistryCache
+        from mcp_installer.server import get_server_details
+        
+        client = self._registry_client()
+        self.enterContext(patch('mcp_installer.server._registry_client', client))
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.headers = {}
+        mock_response.json.return_value = {"id": "123", "name": "org/server"}
+        mock_get.return_value = mock_response
+        
+        first = asyncio.run(get_server_details("123"))
+        second = asyncio.run(get_server_details("123"))
+        
+        mock_get.assert_called_once()
+        self.assertEqual(first["name"], "org/server")
+        self.assertEqual(first, second)
+        # Annotations added by the tool don't leak into the cached response
+        self.assertNotIn("registry_url", mock_response.json.return_value)
+        # The response survives a server restart for conditional revalidation
+        restarted = RegistryCache(cache_dir=client.cache.cache_dir, ttl=300)
+        self.assertEqual(restarted.get(mock_get.call_args.args[0])["body"]["id"], "123")
+    
+    @patch('requests.Session.get')
+    def test_tools_follow_registry_url_changes(self, mock_get):
+        """Test that the shared client is rebuilt when MCP_REGISTRY_URL changes"""
+        import asyncio
+        import os
+        from mcp_installer.server import get_server_details
+        
+        self.enterContext(patch('mcp_installer.server._registry_cache', self._registry_client().cache))
+        self.enterContext(patch('mcp_installer.server._registry_client', None))
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.headers = {}
+        mock_response.json.return_value = {"id": "1", "name": "org/server"}
+        mock_get.return_value = mock_response
+        
+        with patch.dict(os.environ, {"MCP_REGISTRY_URL": "https://old.example"}):
+            result = asyncio.run(get_server_details("1"))
+        self.assertEqual(result["registry_url"], "https://old.example")
+        
+        with patch('requests.Session.close') as mock_close:
+            with patch.dict(os.environ, {"MCP_REGISTRY_URL": "https://new.example"}):
+                result = asyncio.run(get_server_details("1"))
+        # The previous client's pooled connections are released
+        mock_close.assert_called_once()
+        self.assertEqual(mock_get.call_args.args[0], "https://new.example/v0/servers/1")
+        self.assertEqual(result["registry_url"], "https://new.example")
+    
     def test_list_available_servers_tool(self):
         """Test the list_available_servers tool"""
         # Import here to avoid circular imports
@@ -57,6 +145,35 @@ class TestMCPServer(unittest.TestCase):
         # let's just verify that the function exists and is callable
         assert callable(search_servers)
     
+    @patch('mcp_installer.server.install_server_in_vscode')
+    @patch('requests.Session.get')
+    def test_install_server_by_name_reuses_search_result(self, mock_get, mock_install):
+        """Test that installing by name makes a single registry request when packages are listed"""
+        import asyncio
+        from mcp_installer.server import install_server
+        
+        self.enterContext(patch('mcp_installer.server._registry_client', self._registry_client()))
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.headers = {}
+        mock_response.json.return_value = {
+            "servers": [{
+                "id": "123",
+                "name": "test-server",
+                "description": "A test server",
+                "packages": [{"registry_name": "npm", "name": "test-server-pkg"}]
+            }]
+        }
+        mock_get.return_value = mock_response
+        mock_install.return_value = MagicMock(stdout="ok")
+        
+        result = asyncio.run(install_server(server_name="test-server"))
+        
+        self.assertTrue(result["success"])
+        self.assertEqual(result["server_id"], "123")
+        mock_get.assert_called_once()
+        mock_install.assert_called_once_with({"name": "test-server", "command": "npx", "args": ["test-server-pkg"]})
+    
     def test_install_server_tool(self):
         """Test the install_server tool"""
         # Import here to avoid circular imports
@@ -67,13 +184,14 @@ class TestMCPServer(unittest.TestCase):
         assert callable(install_server)
 
     @patch('mcp_installer.main.find_settings_file')
-    @patch('builtins.open', new_callable=mock_open, read_data='{"editor": {"fontSize": 14}}')
-    @patch('json.dump')
-    def test_install_server_in_vscode(self, mock_json_dump, mock_file, mock_find_settings):
+    @patch('builtins.open', new_callable=mock_open, read_data=b'{"editor": {"fontSize": 14}}')
+    @patch('mcp_installer.registry.os.replace', side_effect=OSError(errno.EXDEV, "Invalid cross-device link"))
+    @patch('mcp_installer.registry.tempfile.mkstemp', side_effect=lambda **kwargs: _mkstemp())
+    def test_install_server_in_vscode(self, mock_mkstemp, mock_replace, mock_file, mock_find_settings):
         """Test the install_server_in_vscode function that directly modifies settings.json"""
         from mcp_installer.registry import install_server_in_vscode
         
-        # Setup test data
+        # Setup test data, settings.json can't be replaced so it is rewritten in place
         mock_settings_path = Path('/mock/path/to/settings.json')
         mock_find_settings.return_value = mock_settings_path
         
@@ -91,7 +209,7 @@ class TestMCPServer(unittest.TestCase):
         result = install_server_in_vscode(test_config)
         
         # Verify the file was opened for reading and writing
-        mock_file.assert_any_call(mock_settings_path, 'r')
+        mock_file.assert_any_call(mock_settings_path, 'rb')
         mock_file.assert_any_call(mock_settings_path, 'w')
         
         # Verify the settings were properly updated
@@ -110,9 +228,9 @@ class TestMCPServer(unittest.TestCase):
             }
         }
         
-        # Check that json.dump was called with the expected settings
-        mock_json_dump.assert_called_once()
-        actual_settings = mock_json_dump.call_args[0][0]
+        # Check that the expected settings were written in one go
+        mock_file().write.assert_called_once()
+        actual_settings = json.loads(mock_file().write.call_args[0][0])
         self.assertEqual(actual_settings, expected_settings)
         
         # Verify the return value contains expected information
@@ -121,7 +239,88 @@ class TestMCPServer(unittest.TestCase):
         self.assertEqual(result.stderr, "")
 
     @patch('mcp_installer.main.find_settings_file')
-    @patch('builtins.open', new_callable=mock_open, read_data='{"editor": {"fontSize": 14}}')
+    def test_install_server_in_vscode_replaces_file_atomically(self, mock_find_settings):
+        """Test that install_server_in_vscode swaps in a complete new settings file"""
+        from mcp_installer.registry import install_server_in_vscode
+        import os
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            settings_path = Path(tmpdir) / "settings.json"
+            settings_path.write_text('{"editor": {"fontSize": 14}}')
+            mock_find_settings.return_value = settings_path
+            inode = os.stat(settings_path).st_ino
+            
+            install_server_in_vscode({"name": "test-server", "command": "npx", "args": ["pkg"]})
+            
+            settings = json.loads(settings_path.read_text())
+            self.assertEqual(settings["mcp"]["servers"]["test-server"], {"command": "npx", "args": ["pkg"]})
+            # A new file was renamed into place and no temporary file is left behind
+            self.assertNotEqual(os.stat(settings_path).st_ino, inode)
+            self.assertEqual(os.listdir(tmpdir), ["settings.json"])
+
+    @patch('mcp_installer.main.find_settings_file')
+    def test_install_server_in_vscode_keeps_symlinked_settings(self, mock_find_settings):
+        """Test that a symlinked settings.json is written through, not replaced"""
+        from mcp_installer.registry import install_server_in_vscode
+        import os
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            target = Path(tmpdir) / "dotfiles" / "settings.json"
+            target.parent.mkdir()
+            target.write_text('{"editor": {"fontSize": 14}}')
+            link = Path(tmpdir) / "User" / "settings.json"
+            link.parent.mkdir()
+            link.symlink_to(target)
+            mock_find_settings.return_value = link
+            
+            install_server_in_vscode({"name": "test-server", "command": "npx", "args": ["pkg"]})
+            
+            self.assertTrue(link.is_symlink())
+            settings = json.loads(target.read_text())
+            self.assertEqual(settings["mcp"]["servers"]["test-server"], {"command": "npx", "args": ["pkg"]})
+            self.assertEqual(os.listdir(target.parent), ["settings.json"])
+            self.assertEqual(os.listdir(link.parent), ["settings.json"])
+
+    @patch('mcp_installer.main.find_settings_file')
+    def test_install_server_in_vscode_keeps_settings_when_disk_is_full(self, mock_find_settings):
+        """Test that a failed temp file write leaves settings.json untouched"""
+        from mcp_installer.registry import install_server_in_vscode
+        import os
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            settings_path = Path(tmpdir) / "settings.json"
+            settings_path.write_text('{"editor": {"fontSize": 14}}')
+            mock_find_settings.return_value = settings_path
+            
+            with patch('mcp_installer.registry.os.fdopen', side_effect=OSError(errno.ENOSPC, "No space left on device")):
+                with self.assertRaises(ValueError):
+                    install_server_in_vscode({"name": "test-server", "command": "npx", "args": ["pkg"]})
+            
+            self.assertEqual(settings_path.read_text(), '{"editor": {"fontSize": 14}}')
+            self.assertEqual(os.listdir(tmpdir), ["settings.json"])
+
+    @patch('mcp_installer.main.find_settings_file')
+    def test_install_server_in_vscode_writes_in_place_when_busy(self, mock_find_settings):
+        """Test that a settings.json that can't be replaced is rewritten in place"""
+        from mcp_installer.registry import install_server_in_vscode
+        import os
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            settings_path = Path(tmpdir) / "settings.json"
+            settings_path.write_text('{"editor": {"fontSize": 14}}')
+            mock_find_settings.return_value = settings_path
+            inode = os.stat(settings_path).st_ino
+            
+            with patch('mcp_installer.registry.os.replace', side_effect=OSError(errno.EBUSY, "Device or resource busy")):
+                install_server_in_vscode({"name": "test-server", "command": "npx", "args": ["pkg"]})
+            
+            settings = json.loads(settings_path.read_text())
+            self.assertEqual(settings["mcp"]["servers"]["test-server"], {"command": "npx", "args": ["pkg"]})
+            self.assertEqual(os.stat(settings_path).st_ino, inode)
+            self.assertEqual(os.listdir(tmpdir), ["settings.json"])
+
+    @patch('mcp_installer.main.find_settings_file')
+    @patch('builtins.open', new_callable=mock_open, read_data=b'{"editor": {"fontSize": 14}}')
     def test_install_server_in_vscode_error_handling(self, mock_file, mock_find_settings):
         """Test error handling in install_server_in_vscode when writing fails"""
         from mcp_installer.registry import install_server_in_vscode